@@ -8,27 +8,115 @@ import time
 import json
 import os
 import logging
+import logging.handlers
+import queue
+import gzip
+import shutil
+import atexit
 import re
+import hashlib
+import hmac
+import random
+import threading
+import functools
+import itertools
+import bisect
+import contextlib
+import copy
+import pickle
+import struct
+import importlib.util
+import io
+import cProfile
+import pstats
+import marshal
+import tracemalloc
 import sys
 import requests # Requires: pip install requests
 from datetime import datetime, timedelta
 import pytz
 from dateutil import parser
 from dotenv import load_dotenv
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
+from array import array
 
 # --- CONFIGURATION ---
 UPDATE_URL = "https://raw.githubusercontent.com/effionx/jeffbot/refs/heads/main/bot.py"
 BOT_VERSION = "v0.51"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.FileHandler("bot_debug.log"), logging.StreamHandler()]
-)
+load_dotenv()
+
+# --- LOGGING ---
+# Callers only enqueue records; a QueueListener thread does the formatting and disk I/O, so no
+# hot path ever blocks on the log file. The file rotates on size or age and old files are gzipped.
+LOG_FILE = os.getenv('LOG_FILE', 'bot_debug.log')
+LOG_JSON = os.getenv('LOG_JSON', '') == '1'   # JSON-lines file output
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_MAX_AGE = 86400                              # Rotate at least daily
+LOG_BACKUPS = 14
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates when the file exceeds max_bytes or is older than max_age; rotated files are gzipped."""
+    def __init__(self, filename, max_bytes, max_age, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.max_age = max_age
+        self.opened_at = self._started_at()  # Survives restarts, so frequent !update doesn't defer the daily rollover
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._gzip_rotate
+    def _started_at(self):
+        """When the current file was started: birth time if the OS reports it, else the first record's
+        timestamp (mtime/ctime move on every write). A missing or empty file counts as new."""
+        try:
+            st = os.stat(self.baseFilename)
+            if getattr(st, "st_birthtime", None): return st.st_birthtime
+            with open(self.baseFilename, encoding='utf-8', errors='replace') as f: first = f.readline()
+            m = re.search(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}', first)
+            if m: return time.mktime(time.strptime(m.group().replace("T", " "), "%Y-%m-%d %H:%M:%S"))
+            return st.st_mtime
+        except (OSError, ValueError): return time.time()
+    def shouldRollover(self, record):
+        if time.time() - self.opened_at >= self.max_age and os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            return True
+        return super().shouldRollover(record)
+    def doRollover(self):
+        super().doRollover()
+        self.opened_at = time.time()
+    @staticmethod
+    def _gzip_rotate(source, dest):
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out: shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from logger.x(..., extra={...})."""
+    FIELDS = ("command", "tab", "row", "latency", "user")
+    def format(self, record):
+        out = {"ts": self.formatTime(record), "level": record.levelname, "msg": record.getMessage()}
+        for f in self.FIELDS:
+            if hasattr(record, f): out[f] = getattr(record, f)
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+def setup_logging():
+    file_handler = CompressingRotatingFileHandler(LOG_FILE, LOG_MAX_BYTES, LOG_MAX_AGE, LOG_BACKUPS)
+    file_handler.setFormatter(JsonLineFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Listener-side handlers add the real format
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    listener.start()
+    return listener
+
+def shutdown_logging():
+    """Drain the log queue. Must run before os.execv, which skips atexit hooks."""
+    if _log_listener._thread: _log_listener.stop()
+
+_log_listener = setup_logging()
+atexit.register(shutdown_logging)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 SHEET_NAME = os.getenv('SHEET_NAME')
 PINNED_CHANNEL_ID = int(os.getenv('PINNED_CHANNEL_ID'))
@@ -67,15 +155,52 @@ LOAN_MAX_DAYS = 20
 LOAN_CAP_PERCENT = 0.50 # 50%
 
 # --- BOT SETUP ---
-intents = discord.Intents.default()
-intents.message_content = True 
-intents.reactions = True
-intents.members = True 
+# LOW_MEMORY=1: only the gateway events the bot handles (guilds/threads, messages + content for
+# prefix commands), no member cache or startup chunking, and a small message cache. Nothing reads
+# the member cache; command authors come with the message/interaction payload.
+LOW_MEMORY = os.getenv('LOW_MEMORY', '') == '1'
+LOW_MEMORY_MAX_MESSAGES = 50
+
+if LOW_MEMORY:
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    bot_options = dict(member_cache_flags=discord.MemberCacheFlags.none(), chunk_guilds_at_startup=False,
+                       max_messages=LOW_MEMORY_MAX_MESSAGES)
+else:
+    intents = discord.Intents.default()
+    intents.message_content = True 
+    intents.reactions = True
+    intents.members = True 
+    bot_options = {}
+
+def rss_bytes():
+    """Current resident set size (falls back to peak RSS off Linux)"""
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
 
 class MyBot(commands.Bot):
     def __init__(self):
-        super().__init__(command_prefix='!', intents=intents, help_command=None)
-    async def setup_hook(self): pass
+        super().__init__(command_prefix='!', intents=intents, help_command=None, **bot_options)
+    async def setup_hook(self):
+        self.rss_at_start = rss_bytes()
+        logger.info(f"RSS at startup: {self.rss_at_start / 1048576:.1f} MiB (low memory: {LOW_MEMORY})")
+        load_balance_history()
+        self.warm_start = load_warm_snapshot()
+        await start_form_webhook()
+    async def close(self):
+        await stop_form_webhook()
+        await flush_audit()
+        await flush_state()
+        await flush_balance_history()
+        await save_warm_snapshot()
+        await super().close()
 
 bot = MyBot()
 
@@ -97,25 +222,400 @@ def parse_sheet_timestamp(ts_str):
         return GB_TZ.localize(dt) if dt.tzinfo is None else dt.astimezone(GB_TZ)
     except: return None
 
+# --- CACHE LAYER ---
+# Named caches with an optional TTL and LRU bound, single-flight loading and per-cache counters
+# (see !caches). invalidate() only marks entries expired, so lookup()/peek() can still serve them
+# stale-while-revalidate; clear() drops them. Caches can subscribe to named invalidation events.
+CACHES = {}
+_cache_events = defaultdict(list)  # event -> [Cache]
+_MISSING = object()
+
+class Cache:
+    def __init__(self, name, ttl=None, maxsize=None, invalidated_by=()):
+        self.name, self.ttl, self.maxsize = name, ttl, maxsize
+        self._data = OrderedDict()  # key -> [value, stored_at, valid]
+        self._lock = threading.RLock()  # Shared with executor threads
+        self._key_locks = {}  # key -> [lock, holders+waiters]; dropped when the last one leaves
+        self._inflight = {}  # key -> asyncio.Task
+        self.hits = self.stale_hits = self.misses = self.loads = self.load_errors = self.evictions = 0
+        self.load_seconds = 0.0
+        for event in invalidated_by: _cache_events[event].append(self)
+        CACHES[name] = self
+
+    def _fresh(self, entry):
+        return entry[2] and (self.ttl is None or time.time() - entry[1] < self.ttl)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and self._fresh(entry):
+                self.hits += 1; self._data.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+            return default
+
+    def lookup(self, key):
+        """(value, age, fresh) including expired entries; invalidated ones report an infinite age."""
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry:
+                self.misses += 1
+                return None, None, False
+            fresh = self._fresh(entry)
+            if fresh: self.hits += 1
+            else: self.stale_hits += 1
+            return entry[0], (time.time() - entry[1]) if entry[2] else float("inf"), fresh
+
+    def peek(self, key):
+        """(value, stored_at) without touching the counters; (None, 0) if absent."""
+        with self._lock:
+            entry = self._data.get(key)
+            return (entry[0], entry[1]) if entry else (None, 0)
+
+    def set(self, key, value, stored_at=None):
+        with self._lock:
+            self._data[key] = [value, time.time() if stored_at is None else stored_at, True]
+            self._data.move_to_end(key)
+            while self.maxsize and len(self._data) > self.maxsize:
+                self._data.popitem(last=False); self.evictions += 1
+
+    def invalidate(self, key=None):
+        with self._lock:
+            for k in ([key] if key is not None else list(self._data)):
+                if k in self._data: self._data[k][2] = False
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+    def get_or_load(self, key, loader):
+        """Blocking single-flight load: concurrent callers for the same key wait for one loader call.
+        A None result is returned but not cached."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING: return value
+        with self._lock:
+            slot = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                with self._lock:
+                    entry = self._data.get(key)
+                    if entry and self._fresh(entry): return entry[0]  # Loaded while we waited
+                value = self._timed(loader)
+                if value is not None: self.set(key, value)
+                return value
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]: del self._key_locks[key]
+
+    async def single_flight(self, key, factory):
+        """Await factory() once per key at a time; concurrent callers share the in-flight result.
+        The loader decides what to store (e.g. keeping the age of a stale fetch)."""
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            async def run():
+                started = time.perf_counter()
+                try: return await factory()
+                except Exception:
+                    self.load_errors += 1; raise
+                finally:
+                    self.loads += 1; self.load_seconds += time.perf_counter() - started
+            task = self._inflight[key] = asyncio.create_task(run())
+        return await asyncio.shield(task)
+
+    def _timed(self, loader):
+        started = time.perf_counter()
+        try: return loader()
+        except Exception:
+            self.load_errors += 1; raise
+        finally:
+            self.loads += 1; self.load_seconds += time.perf_counter() - started
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data), "hits": self.hits, "stale": self.stale_hits, "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else None, "loads": self.loads, "errors": self.load_errors,
+            "avg_load_ms": (self.load_seconds / self.loads * 1000) if self.loads else None, "evictions": self.evictions,
+        }
+
+def notify_cache_event(event):
+    """Invalidate every cache subscribed to `event` (e.g. "ledger_write" after appending a row)."""
+    for cache in _cache_events.get(event, ()): cache.invalidate()
+
 # --- CACHED GSPREAD CLIENT ---
-_gspread_client = None
-_gspread_client_time = 0
 _GSPREAD_TTL = 1800  # Re-auth every 30 minutes
+_client_cache = Cache("gspread_client", ttl=_GSPREAD_TTL, maxsize=1)
 
-def get_gspread_client():
-    global _gspread_client, _gspread_client_time
-    now = time.time()
-    if _gspread_client and (now - _gspread_client_time) < _GSPREAD_TTL:
-        return _gspread_client
+def _authorize_gspread():
     scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     try:
         creds = ServiceAccountCredentials.from_json_keyfile_name("service_account.json", scope)
-        _gspread_client = gspread.authorize(creds)
-        _gspread_client_time = now
-        return _gspread_client
-    except:
-        _gspread_client = None
+        client = gspread.authorize(creds)
+    except Exception as e:
+        logger.error(f"Sheets auth failed: {e}")
         return None
+    notify_cache_event("reauth")  # Handles are bound to the old client
+    return client
+
+def get_gspread_client(): return _client_cache.get_or_load("client", _authorize_gspread)
+
+def force_gspread_reauth(): _client_cache.invalidate()
+
+# --- SHEETS RESILIENCE ---
+# Every Sheets request goes through sheets_call: errors are classified, retryable ones back off
+# with jitter (honouring Retry-After), requests are metered against a per-spreadsheet budget,
+# and a circuit breaker fails fast while the API is unhealthy so callers serve last good data.
+_SHEETS_MAX_ATTEMPTS = 4
+_SHEETS_BASE_BACKOFF = 1.0
+_SHEETS_MAX_BACKOFF = 20.0
+_SHEETS_BUDGET = 50          # Requests per window per spreadsheet (Google allows 60 reads/min/user)
+_SHEETS_BUDGET_WINDOW = 60
+_BREAKER_THRESHOLD = 3       # Consecutive failed calls before the circuit opens
+_BREAKER_COOLDOWN = 60       # Seconds before a half-open trial, doubled on each failed trial
+_BREAKER_MAX_COOLDOWN = 900
+
+class SheetsError(Exception):
+    """A classified Sheets failure. kind is one of quota, transient, auth, not_found, fatal,
+    circuit_open, throttled (our own request budget ran dry; the API never saw the call)."""
+    def __init__(self, kind, message, retry_after=None):
+        super().__init__(f"[{kind}] {message}")
+        self.kind = kind; self.retry_after = retry_after
+    @property
+    def retryable(self): return self.kind in ("quota", "transient")
+
+def classify_sheets_error(e):
+    if isinstance(e, SheetsError): return e
+    if isinstance(e, (gspread.exceptions.WorksheetNotFound, gspread.exceptions.SpreadsheetNotFound)):
+        return SheetsError("not_found", str(e))
+    if isinstance(e, gspread.exceptions.APIError):
+        retry_after = None
+        try: retry_after = float(e.response.headers.get("Retry-After"))
+        except (TypeError, ValueError, AttributeError): pass
+        status = str(e.error.get("status", ""))
+        if e.code == 429 or status == "RESOURCE_EXHAUSTED" or (e.code == 403 and "rate" in str(e).lower()):
+            return SheetsError("quota", str(e), retry_after)
+        if e.code == 404: return SheetsError("not_found", str(e))
+        if e.code == 401 or status == "UNAUTHENTICATED": return SheetsError("auth", str(e))
+        if e.code >= 500 or e.code in (-1, 408): return SheetsError("transient", str(e), retry_after)
+        return SheetsError("fatal", str(e))
+    if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ConnectionError, TimeoutError)):
+        return SheetsError("transient", str(e))
+    if "AccessTokenRefreshError" in type(e).__name__: return SheetsError("auth", str(e))
+    return SheetsError("fatal", f"{type(e).__name__}: {e}")
+
+class RequestBudget:
+    """Sliding-window request budget. Blocks (up to max_wait) until a slot frees up."""
+    def __init__(self, limit, window):
+        self.limit = limit; self.window = window
+        self._stamps = deque(); self._lock = threading.Lock()
+    def acquire(self, cost=1, max_wait=30):
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._stamps and now - self._stamps[0] >= self.window: self._stamps.popleft()
+                if len(self._stamps) + cost <= self.limit:
+                    self._stamps.extend([now] * cost)
+                    return
+                wait = self.window - (now - self._stamps[0])
+            if time.monotonic() + wait > deadline:
+                raise SheetsError("throttled", f"Local request budget exhausted ({self.limit}/{self.window}s)", wait)
+            time.sleep(wait)
+
+class CircuitBreaker:
+    def __init__(self, threshold, cooldown, max_cooldown):
+        self.threshold = threshold; self.base_cooldown = cooldown; self.max_cooldown = max_cooldown
+        self.cooldown = cooldown; self.failures = 0; self.opened_at = None; self.trial = False
+        self._lock = threading.Lock()
+    @property
+    def is_open(self):
+        return self.opened_at is not None and (time.monotonic() - self.opened_at) < self.cooldown
+    def before_call(self):
+        """Raises while open. Returns True if this call is the half-open trial."""
+        with self._lock:
+            if self.opened_at is None: return False
+            if (time.monotonic() - self.opened_at) < self.cooldown or self.trial:
+                raise SheetsError("circuit_open", "Sheets API marked unhealthy, serving cached data")
+            self.trial = True  # Half-open: let exactly one call through
+            return True
+    def end_trial(self):
+        with self._lock: self.trial = False  # Unresolved trial: let the next call try again
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None: logger.info("Sheets circuit closed")
+            self.failures = 0; self.opened_at = None; self.trial = False; self.cooldown = self.base_cooldown
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            if self.trial or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial: logger.warning(f"Sheets circuit open for {self.cooldown:.0f}s")
+                self.opened_at = time.monotonic(); self.trial = False
+
+_sheets_budgets = {}
+_sheets_budgets_lock = threading.Lock()
+_sheets_breaker = CircuitBreaker(_BREAKER_THRESHOLD, _BREAKER_COOLDOWN, _BREAKER_MAX_COOLDOWN)
+
+def _sheets_budget():
+    key = _sheet_key or SHEET_NAME
+    with _sheets_budgets_lock:
+        if key not in _sheets_budgets: _sheets_budgets[key] = RequestBudget(_SHEETS_BUDGET, _SHEETS_BUDGET_WINDOW)
+        return _sheets_budgets[key]
+
+def sheets_healthy(): return not _sheets_breaker.is_open
+
+def sheets_call(fn, cost=1, label="sheets"):
+    """Run fn() (one logical Sheets operation) with classification, backoff, budget and circuit breaking."""
+    is_trial = _sheets_breaker.before_call()
+    try: return _sheets_call(fn, cost, label)
+    finally:
+        if is_trial: _sheets_breaker.end_trial()
+
+def _sheets_call(fn, cost, label):
+    last = None
+    for attempt in range(_SHEETS_MAX_ATTEMPTS):
+        try:
+            _sheets_budget().acquire(cost)
+            result = fn()
+            _sheets_breaker.record_success()
+            return result
+        except Exception as e:
+            last = classify_sheets_error(e)
+            if last.kind == "not_found" and attempt == 0:
+                logger.warning(f"{label}: handle not found, re-resolving: {e}")
+                invalidate_sheet_handles()
+                continue
+            if last.kind == "auth" and attempt == 0:
+                logger.warning(f"{label}: auth error, re-authenticating: {e}")
+                force_gspread_reauth()
+                continue
+            if not last.retryable or attempt == _SHEETS_MAX_ATTEMPTS - 1: break
+            delay = min(_SHEETS_MAX_BACKOFF, _SHEETS_BASE_BACKOFF * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            if last.retry_after: delay = max(delay, min(last.retry_after, _SHEETS_MAX_BACKOFF))
+            logger.warning(f"{label}: {last}; retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+    if last.kind == "fatal": _sheets_breaker.record_success()  # The API answered; the request itself was bad
+    elif last.kind != "throttled": _sheets_breaker.record_failure()  # Local throttling says nothing about API health
+    raise last
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call (Sheets I/O, retries, backoff) in the default executor so it never stalls the gateway."""
+    call = functools.partial(fn, *args, **kwargs)
+    if _cpu_profile is not None: call = functools.partial(_profiled_call, _cpu_profile, call)
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+# --- PROFILING ---
+# `!profile` attaches cProfile (or diffs tracemalloc snapshots) against the live process for a
+# window. cProfile only sees the thread it was enabled on, so while a CPU profile is running each
+# run_blocking() call is profiled in its worker thread and merged in afterwards.
+_PROFILE_MAX_SECONDS = 300
+_PROFILE_TOP_N = 15
+_cpu_profile = None     # {"main": Profile, "workers": [Profile, ...]} while a CPU profile is active
+_profile_busy = False
+
+def _profiled_call(session, call):
+    prof = cProfile.Profile()
+    try: prof.enable()
+    except ValueError: return call()  # 3.12+: the main profiler already covers every thread
+    try: return call()
+    finally:
+        prof.disable()
+        session["workers"].append(prof)
+
+async def profile_cpu(seconds):
+    """Profile the event loop (and executor work) for `seconds`. Returns pstats.Stats."""
+    global _cpu_profile
+    session = {"main": cProfile.Profile(), "workers": []}
+    _cpu_profile = session
+    session["main"].enable()
+    try: await asyncio.sleep(seconds)
+    finally:
+        session["main"].disable()
+        _cpu_profile = None
+    stats = pstats.Stats(session["main"])
+    for prof in session["workers"]: stats.add(prof)
+    return stats
+
+async def profile_mem(seconds):
+    """Diff two tracemalloc snapshots taken `seconds` apart. Returns (diff, current, peak)."""
+    started = not tracemalloc.is_tracing()
+    if started: tracemalloc.start(10)
+    try:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+        before = tracemalloc.take_snapshot().filter_traces(ignore)
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+        current, peak = tracemalloc.get_traced_memory()
+        return after.compare_to(before, "lineno"), current, peak
+    finally:
+        if started: tracemalloc.stop()
+
+def _fmt_func(func):
+    path, line, name = func
+    return f"{os.path.basename(path)}:{line}({name})" if line else name
+
+def _is_idle(func): return func[0] == "~" and ("select" in func[2] or "poll" in func[2])  # Selector waits
+
+def summarize_cpu(stats, top=_PROFILE_TOP_N):
+    """Top-N bot.py functions by cumulative time, the hottest functions overall by self time, and busy ms."""
+    rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)
+    ours = [r for r in rows if os.path.basename(r[0][0]) == os.path.basename(__file__)][:top]
+    lines = [f"`{ct*1000:8.1f}ms cum | {tt*1000:7.1f}ms self | {nc:>6}x` {_fmt_func(f)}" for f, (cc, nc, tt, ct, _) in ours]
+    busy = [r for r in sorted(rows, key=lambda kv: kv[1][2], reverse=True) if not _is_idle(r[0])]
+    hottest = [f"`{tt*1000:8.1f}ms self | {nc:>6}x` {_fmt_func(f)}" for f, (cc, nc, tt, ct, _) in busy[:top // 2]]
+    return lines, hottest, sum(r[1][2] for r in busy)
+
+def render_cpu_report(stats):
+    buf = io.StringIO()
+    stats.stream = buf
+    stats.sort_stats("cumulative").print_stats()
+    buf.write("\n\n")
+    stats.sort_stats("tottime").print_stats(100)
+    return buf.getvalue()
+
+def render_mem_report(diff, current, peak, top=100):
+    lines = [f"Traced now: {current / 1048576:.1f} MiB | peak: {peak / 1048576:.1f} MiB", ""]
+    lines += [str(s) for s in diff[:top]]
+    return "\n".join(lines)
+
+# --- CACHED SHEET HANDLES ---
+# The spreadsheet is resolved once (by SHEET_KEY, or by title the first time) and every
+# Worksheet comes from a single metadata fetch. Dropped on re-auth or any not-found error.
+_sheet_key = os.getenv('SHEET_KEY')
+_handle_cache = Cache("sheet_handles", invalidated_by=("reauth",))  # "wb" + one entry per tab title
+
+def invalidate_sheet_handles(): _handle_cache.clear()
+
+def get_workbook(client=None):
+    def open_workbook():
+        global _sheet_key
+        c = get_gspread_client() or client  # Prefer the live client in case a re-auth just happened
+        if not c: raise SheetsError("auth", "Sheets client unavailable")
+        _sheets_budget().acquire(2)  # Open + worksheet listing
+        wb = c.open_by_key(_sheet_key) if _sheet_key else c.open(SHEET_NAME)
+        _sheet_key = wb.id
+        for ws in wb.worksheets(): _handle_cache.set(("tab", ws.title), ws)
+        return wb
+    return _handle_cache.get_or_load("wb", open_workbook)
+
+def get_worksheet(tab, client=None):
+    wb = get_workbook(client)
+    return _handle_cache.get_or_load(("tab", tab), lambda: wb.worksheet(tab))
+
+def a1(tab, rng): return f"'{tab}'!{rng}"
+
+def batch_read(ranges, client=None):
+    """Read several ranges (see a1()) in one values:batchGet round trip. Returns one row list per range."""
+    def read():
+        resp = get_workbook(client).values_batch_get(ranges)
+        return [vr.get("values", []) for vr in resp.get("valueRanges", [])]
+    return sheets_call(read, label="batch")
+
+def with_worksheet(tab, fn, client=None, cost=1):
+    """Run fn(worksheet) on the cached handle through sheets_call (re-resolves the handle on not-found)."""
+    return sheets_call(lambda: fn(get_worksheet(tab, client)), cost=cost, label=tab)
 
 def append_row_manual(client, tab_name, row_data):
     """
@@ -123,44 +623,116 @@ def append_row_manual(client, tab_name, row_data):
     Logs the exact cell coordinates for debugging.
     """
     try:
-        wb = client.open(SHEET_NAME)
-        sheet = wb.worksheet(tab_name)
-        
-        # 1. Get all current data to find the length
-        existing_data = sheet.get_all_values()
-        next_row = len(existing_data) + 1
-        
-        # 2. Calculate target range (e.g., A50:E50)
-        # Assuming data starts at Column A and row_data has 'n' items
-        # ord('A') is 65. If len is 5, we want E (69). 65 + 5 - 1 = 69.
-        end_col_char = chr(65 + len(row_data) - 1) 
-        target_range = f"A{next_row}:{end_col_char}{next_row}"
-        
-        # 3. Write data to specific range
-        # Note: Using keyword args for compatibility with recent gspread versions
-        sheet.update(range_name=target_range, values=[row_data])
+        def write(sheet):
+            # 1. Get all current data to find the length
+            existing_data = sheet.get_all_values()
+            next_row = len(existing_data) + 1
+            
+            # 2. Calculate target range (e.g., A50:E50)
+            # Assuming data starts at Column A and row_data has 'n' items
+            # ord('A') is 65. If len is 5, we want E (69). 65 + 5 - 1 = 69.
+            end_col_char = chr(65 + len(row_data) - 1) 
+            target_range = f"A{next_row}:{end_col_char}{next_row}"
+            
+            # 3. Write data to specific range
+            # Note: Using keyword args for compatibility with recent gspread versions
+            sheet.update(range_name=target_range, values=[row_data])
+            return next_row, target_range
+        started = time.perf_counter()
+        next_row, target_range = with_worksheet(tab_name, write, client, cost=2)
+        latency = round((time.perf_counter() - started) * 1000)
+        if tab_name in LEDGER_TABS: notify_cache_event("ledger_write")
         
         # 4. Success Log
-        logger.info(f"✅ [SHEET INSERT] Tab: '{tab_name}' | Row: {next_row} | Range: {target_range} | Data: {row_data}")
+        logger.info(f"✅ [SHEET INSERT] Tab: '{tab_name}' | Row: {next_row} | Range: {target_range} | Data: {row_data}",
+                    extra={"tab": tab_name, "row": next_row, "latency": latency, "user": row_data[1] if len(row_data) > 1 else None})
         return next_row
         
     except Exception as e:
         logger.error(f"❌ [SHEET ERROR] Failed to insert at '{tab_name}': {e}")
         raise e
 
-async def log_to_channel(title, description, color=discord.Color.light_grey):
+# --- AUDIT LOG (BATCHED) ---
+# Audit events are buffered and posted to LOG_CHANNEL_ID as multi-embed messages (or one digest
+# embed with AUDIT_DIGEST=1) every minute or once a message's worth has queued up. Urgent events
+# (errors) bypass the buffer. Every event also goes to the file log, so a Discord outage loses nothing.
+AUDIT_DIGEST = os.getenv('AUDIT_DIGEST', '') == '1'
+_AUDIT_FLUSH_SECONDS = 60
+_AUDIT_FLUSH_SIZE = 10      # Discord allows 10 embeds per message
+_AUDIT_BUFFER_MAX = 200     # Oldest events are dropped (file log keeps them) past this
+_AUDIT_MSG_CHARS = 6000     # Discord's total embed text limit per message
+_audit_buffer = []
+_audit_lock = asyncio.Lock()
+
+async def log_to_channel(title, description, color=discord.Color.light_grey, urgent=False):
+    logger.info(f"[AUDIT] {title}: {description[:300]}")
+    embed = discord.Embed(title=title, description=description, color=color, timestamp=datetime.now())
+    if urgent: return await _send_audit([embed])
+    _audit_buffer.append(embed)
+    if len(_audit_buffer) > _AUDIT_BUFFER_MAX: del _audit_buffer[:len(_audit_buffer) - _AUDIT_BUFFER_MAX]
+    if len(_audit_buffer) >= _AUDIT_FLUSH_SIZE: await flush_audit()
+
+def _audit_digest(embeds):
+    """Collapse many events into as few embeds as possible: one line per event. Returns [(digest, events covered)]."""
+    lines = []
+    for e in embeds:
+        first = (e.description or "").splitlines()[0] if e.description else ""
+        lines.append(f"`{e.timestamp.strftime('%H:%M')}` **{e.title}** {first}"[:300])
+    digests, cur = [], []
+    for line in lines:
+        if sum(len(l) + 1 for l in cur) + len(line) > 4000:
+            digests.append(cur); cur = []
+        cur.append(line)
+    if cur: digests.append(cur)
+    return [(discord.Embed(title=f"🧾 Audit Digest ({len(d)} events)", description="\n".join(d), color=discord.Color.light_grey(), timestamp=datetime.now()), len(d)) for d in digests]
+
+async def _send_audit(embeds):
+    """Send embeds in as few messages as the 10-embed / 6000-char limits allow. Returns how many were sent."""
     channel = bot.get_channel(LOG_CHANNEL_ID)
-    if not channel: return
-    try:
-        embed = discord.Embed(title=title, description=description, color=color, timestamp=datetime.now())
-        await channel.send(embed=embed)
-    except Exception as e: logger.error(f"Failed to log: {e}")
+    if not channel: return 0
+    sent = 0
+    while sent < len(embeds):
+        chunk, size = [], 0
+        for e in embeds[sent:sent + _AUDIT_FLUSH_SIZE]:
+            if chunk and size + len(e) > _AUDIT_MSG_CHARS: break
+            chunk.append(e); size += len(e)
+        try: await channel.send(embeds=chunk)
+        except Exception as e:
+            logger.error(f"Failed to log: {e}")
+            return sent
+        sent += len(chunk)
+    return sent
+
+async def flush_audit():
+    async with _audit_lock:
+        if not _audit_buffer: return
+        batch = _audit_buffer[:]; _audit_buffer.clear()
+        if AUDIT_DIGEST and len(batch) > 1:
+            digests = _audit_digest(batch)
+            sent = sum(n for _, n in digests[:await _send_audit([d for d, _ in digests])])  # Events in the digests that went out
+        else: sent = await _send_audit(batch)
+        if sent < len(batch):  # Keep unsent events for the next flush
+            _audit_buffer[:0] = batch[sent:]
+            del _audit_buffer[:max(0, len(_audit_buffer) - _AUDIT_BUFFER_MAX)]
+
+async def restart_process():
+    """Replace this process with a fresh copy of the bot (after a self-update)."""
+    await flush_audit()
+    await flush_state()
+    await flush_balance_history()
+    await save_warm_snapshot()
+    shutdown_logging()
+    os.execv(sys.executable, ['python'] + sys.argv)
 
 def get_mapped_name(user: discord.User): return PLAYER_MAP.get(user.id, user.display_name)
 
 # --- STATE MANAGEMENT (IN-MEMORY CACHE) ---
 _state_cache = None
-_state_dirty = False
+_state_rev = 0              # Bumped on every save; lets renderers cheaply tell whether state changed
+_dirty_sections = set()     # Top-level keys written since the last flush snapshot
+_snapshot = {}              # Last flushed copy of each section, reused while a section stays clean
+_state_locks = defaultdict(asyncio.Lock)  # Per-section locks for state_txn()
+_flush_lock = asyncio.Lock()
 
 def load_state():
     global _state_cache
@@ -168,8 +740,8 @@ def load_state():
         return _state_cache
     defaults = {
         "timers": {}, "custom_cmds": {}, "standard_overrides": {}, 
-        "motd": "", "last_motd_date": "", "last_form_row": 1, 
-        "vacation": [], "debts": {}, "bump": {} 
+        "motd": "", "last_form_row": 1, 
+        "vacation": [], "debts": {}, "jobs": {}
     }
     if not os.path.exists(STATE_FILE):
         _state_cache = defaults
@@ -186,22 +758,55 @@ def load_state():
         _state_cache = defaults
         return defaults
 
-def save_state(state):
-    global _state_cache, _state_dirty
+def save_state(state, *sections):
+    """Publish in-place edits to the cached state. Name the top-level sections you touched so the next
+    flush only copies those; with none given, every section is marked dirty."""
+    global _state_cache, _state_rev
     _state_cache = state
-    _state_dirty = True
-
-def _flush_state():
-    """Write cached state to disk. Called periodically instead of on every save."""
-    global _state_dirty
-    if not _state_dirty or _state_cache is None:
-        return
-    try:
-        with open(STATE_FILE, 'w') as f:
-            json.dump(_state_cache, f, indent=4)
-        _state_dirty = False
-    except Exception as e:
-        logger.error(f"Failed to flush state: {e}")
+    _dirty_sections.update(sections or state)
+    _state_rev += 1
+
+@contextlib.asynccontextmanager
+async def state_txn(*sections):
+    """Lock the given top-level sections and yield private copies of them; on a clean exit they are
+    committed together, and any exception discards every change. Hold it across awaits that must not
+    interleave with another writer (e.g. check debt -> append to sheet -> record debt)."""
+    global _state_rev
+    async with contextlib.AsyncExitStack() as stack:
+        for name in sorted(set(sections)): await stack.enter_async_context(_state_locks[name])  # Fixed order: no deadlocks
+        state = load_state()
+        work = {name: copy.deepcopy(state.get(name)) for name in sections}
+        yield work
+        for name in sections: state[name] = work[name]
+        _dirty_sections.update(sections)
+        _state_rev += 1
+
+def _take_snapshot():
+    """Copy-on-write snapshot for flushing: only sections written since the last one are copied."""
+    if not _snapshot: _dirty_sections.update(_state_cache)
+    for name in _dirty_sections:
+        if name in _state_cache: _snapshot[name] = copy.deepcopy(_state_cache[name])
+        else: _snapshot.pop(name, None)
+    _dirty_sections.clear()
+    return dict(_snapshot)
+
+def _write_snapshot(snap):
+    """Serialize and write via temp file + rename so a crash mid-write never leaves a torn state file."""
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(snap, f, indent=4)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, STATE_FILE)
+
+async def flush_state():
+    """Write cached state to disk. Called periodically instead of on every save; serialization runs off the loop."""
+    if not _dirty_sections or _state_cache is None: return
+    async with _flush_lock:
+        snap = _take_snapshot()
+        try: await run_blocking(_write_snapshot, snap)
+        except Exception as e:
+            logger.error(f"Failed to flush state: {e}")
+            _dirty_sections.update(snap)  # Retry on the next flush
 
 def get_ping_string():
     state = load_state()
@@ -212,93 +817,491 @@ def get_ping_string():
     return " ".join(pings) if pings else "*(No active users)*"
 
 # --- FINANCIAL LOGIC ---
+def parse_gold(val_str):
+    # Clean string "34,200g" -> 34200
+    return int(str(val_str).lower().replace('g', '').replace(',', '').strip())
+
 def get_gbank_balance(client=None):
+    """Live read of Dashboard!B2. Returns None on error so callers never mistake a failure for an empty bank."""
     if not client: client = get_gspread_client()
-    if not client: return 0
+    if not client: return None
     try:
-        wb = client.open(SHEET_NAME)
-        val_str = wb.worksheet(TAB_DASHBOARD).acell('B2').value
-        # Clean string "34,200g" -> 34200
-        clean = str(val_str).lower().replace('g', '').replace(',', '').strip()
-        return int(clean)
-    except:
+        return parse_gold(with_worksheet(TAB_DASHBOARD, lambda ws: ws.acell('B2').value, client))
+    except Exception as e:
+        logger.error(f"Gbank read error: {e}")
+        return None
+
+# --- LOCAL BANK BALANCE ---
+# Seeded from Dashboard!B2, moved optimistically by every row the bot writes, reconciled periodically.
+_bank_balance = None
+_bank_balance_time = 0
+_BANK_RECONCILE_INTERVAL = 600  # Reconcile against the sheet every 10 minutes
+
+def set_local_gbank(value):
+    global _bank_balance, _bank_balance_time
+    if _bank_balance is not None and value != _bank_balance:
+        logger.info(f"Gbank reconciled: local {_bank_balance}g -> sheet {value}g")
+    _bank_balance = value
+    _bank_balance_time = time.time()
+    if value is not None: balance_history.add(_bank_balance_time, value)
+
+def adjust_local_gbank(delta):
+    """Apply a deposit/withdraw/lend/return the bot has just written to the sheet."""
+    global _bank_balance
+    if _bank_balance is not None:
+        _bank_balance += delta
+        balance_history.add(time.time(), _bank_balance)
+
+def reconcile_gbank(client=None):
+    val = get_gbank_balance(client)
+    if val is None: return False
+    set_local_gbank(val)
+    return True
+
+def get_local_gbank():
+    """Returns (balance, stale). Only touches the sheet if no balance has been loaded yet."""
+    if _bank_balance is None: reconcile_gbank()
+    stale = (time.time() - _bank_balance_time) > _BANK_RECONCILE_INTERVAL * 2
+    return _bank_balance, stale
+
+def gbank_stale_note():
+    return f"\n⚠️ Balance last synced <t:{int(_bank_balance_time)}:R>" if _bank_balance_time else ""
+
+# --- BALANCE HISTORY ---
+# Every balance sample (refreshes, reconciles, transactions) lands in three fixed-size rings at once:
+# per-minute for a day, per-hour for 30 days, per-day for two years. Each slot keeps the bucket's
+# close/low/high, so old data is downsampled as it goes and the footprint never grows. Persisted
+# as packed arrays in BALANCE_HISTORY_FILE, not JSON.
+BALANCE_HISTORY_FILE = 'bank_history.bin'
+_HISTORY_MAGIC = b"JBTS"
+_HISTORY_TIERS = [(60, 1440), (3600, 720), (86400, 730)]  # (bucket seconds, slots)
+_SPARK = "▁▂▃▄▅▆▇█"
+
+class SeriesTier:
+    FIELDS = ("ts", "close", "lo", "hi")
+
+    def __init__(self, step, size):
+        self.step, self.size, self.head, self.count = step, size, 0, 0  # head = next slot to write
+        self.cols = {f: array('q', bytes(8 * size)) for f in self.FIELDS}
+
+    def add(self, ts, value):
+        bucket = int(ts) - int(ts) % self.step
+        last = (self.head - 1) % self.size
+        c = self.cols
+        if self.count and c["ts"][last] == bucket:
+            c["close"][last] = value
+            c["lo"][last] = min(c["lo"][last], value); c["hi"][last] = max(c["hi"][last], value)
+            return
+        if self.count and bucket < c["ts"][last]: return  # Out-of-order sample
+        for f, v in zip(self.FIELDS, (bucket, value, value, value)): c[f][self.head] = v
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def span(self): return self.step * self.size
+
+    def samples(self, since=0):
+        """(ts, close, lo, hi) oldest first, from `since` on."""
+        start = (self.head - self.count) % self.size
+        c = self.cols
+        for i in range(self.count):
+            j = (start + i) % self.size
+            if c["ts"][j] >= since: yield c["ts"][j], c["close"][j], c["lo"][j], c["hi"][j]
+
+class BalanceHistory:
+    def __init__(self):
+        self.tiers = [SeriesTier(step, size) for step, size in _HISTORY_TIERS]
+        self.lock = threading.Lock()  # Samples arrive from executor threads too
+        self.rev = 0; self.saved_rev = 0  # Bumped per sample / set once a write of that revision succeeds
+
+    @property
+    def dirty(self): return self.rev != self.saved_rev
+
+    def add(self, ts, value):
+        with self.lock:
+            for tier in self.tiers: tier.add(ts, int(value))
+            self.rev += 1
+
+    def query(self, seconds, now=None):
+        """Samples from the finest tier that covers the window."""
+        now = now or time.time()
+        tier = next((t for t in self.tiers if t.span() >= seconds), self.tiers[-1])
+        with self.lock: return list(tier.samples(now - seconds))
+
+    def pack(self):
+        with self.lock:
+            out = [struct.pack("<4sBB", _HISTORY_MAGIC, 1 if sys.byteorder == "little" else 0, len(self.tiers))]
+            for t in self.tiers:
+                out.append(struct.pack("<qIII", t.step, t.size, t.head, t.count))
+                out += [t.cols[f].tobytes() for f in SeriesTier.FIELDS]
+            return b"".join(out)
+
+    def unpack(self, data):
+        magic, little, n = struct.unpack_from("<4sBB", data)
+        if magic != _HISTORY_MAGIC: raise ValueError("not a balance history file")
+        off = struct.calcsize("<4sBB")
+        tiers = []
+        for _ in range(n):
+            step, size, head, count = struct.unpack_from("<qIII", data, off); off += struct.calcsize("<qIII")
+            t = SeriesTier(step, size); t.head, t.count = head, count
+            for f in SeriesTier.FIELDS:
+                col = array('q'); col.frombytes(data[off:off + 8 * size]); off += 8 * size
+                if bool(little) != (sys.byteorder == "little"): col.byteswap()
+                t.cols[f] = col
+            tiers.append(t)
+        if [(t.step, t.size) for t in tiers] != _HISTORY_TIERS: raise ValueError("tier layout changed")
+        with self.lock: self.tiers = tiers
+
+balance_history = BalanceHistory()
+
+def load_balance_history():
+    if not os.path.exists(BALANCE_HISTORY_FILE): return
+    try:
+        with open(BALANCE_HISTORY_FILE, 'rb') as f: balance_history.unpack(f.read())
+    except Exception as e: logger.error(f"Balance history unreadable, starting fresh: {e}")
+
+def _write_balance_history(data):
+    tmp = BALANCE_HISTORY_FILE + ".tmp"
+    with open(tmp, 'wb') as f: f.write(data)
+    os.replace(tmp, BALANCE_HISTORY_FILE)
+
+async def flush_balance_history():
+    if not balance_history.dirty: return
+    rev = balance_history.rev  # Read before packing: a sample landing mid-write just leaves it dirty
+    try: await run_blocking(lambda: _write_balance_history(balance_history.pack()))
+    except Exception as e: logger.error(f"Failed to save balance history: {e}")  # Still dirty, retried next flush
+    else: balance_history.saved_rev = rev
+
+def sparkline(values):
+    if not values: return ""
+    lo, hi = min(values), max(values)
+    if hi == lo: return _SPARK[3] * len(values)
+    return "".join(_SPARK[int((v - lo) / (hi - lo) * (len(_SPARK) - 1))] for v in values)
+
+def trend_summary(seconds, width=40):
+    """min/max/delta and a sparkline of the closes over the last `seconds`, or None without samples."""
+    now = time.time()
+    samples = balance_history.query(seconds, now)
+    if not samples: return None
+    start = now - seconds
+    slots, j, last = [], 0, samples[0][1]
+    for i in range(width):  # Last close at or before each slot's end (carried forward)
+        end = start + seconds * (i + 1) / width
+        while j < len(samples) and samples[j][0] <= end: last = samples[j][1]; j += 1
+        if samples[0][0] <= end: slots.append(last)
+    first, final = samples[0][1], samples[-1][1]
+    return {
+        "min": min(s[2] for s in samples), "max": max(s[3] for s in samples), "first": first, "last": final,
+        "delta": final - first, "pct": ((final - first) / first * 100) if first else None,
+        "since": samples[0][0], "samples": len(samples), "spark": sparkline(slots),
+    }
+
+# --- LOCAL LEDGER ---
+# Raw rows of each ledger tab (header excluded), split into fixed-size blocks with a hash per block.
+# Refreshes only fetch rows past the end of each tab; ledger_reconciler re-reads history at low
+# frequency and re-parses only blocks whose hash changed, so manual edits to old rows still land.
+LEDGER_TABS = [TAB_DISCORD, TAB_FORM, TAB_OLD]
+_LEDGER_BLOCK = 200  # Rows per block
+_ledger = {tab: {"rows": [], "hashes": [], "entries": []} for tab in LEDGER_TABS}
+_ledger_lock = threading.RLock()  # Refresh and reconcile run in executor threads
+_ledger_version = 0  # Bumped (under _ledger_lock) whenever parsed ledger content changes
+
+def _clean_rows(rows):
+    """Strip trailing blank cells and rows so tail reads and full reads hash identically."""
+    out = []
+    for r in rows:
+        r = list(r)
+        while r and r[-1] == "": r.pop()
+        out.append(r)
+    while out and not out[-1]: out.pop()
+    return out
+
+def _block_hash(rows):
+    return hashlib.blake2b(json.dumps(rows).encode(), digest_size=8).hexdigest()
+
+def _parse_ledger_rows(rows):
+    entries = []
+    for r in rows:
+        if len(r) < 4: continue
+        ts = parse_sheet_timestamp(r[0])
+        if not ts: continue
+        try:
+            entries.append({"ts": ts, "player": r[1], "type": r[2] or "Unknown", "gold": parse_gold(r[3]), "desc": r[4] if len(r)>4 else ""})
+        except: continue
+    return entries
+
+def _rehash_ledger(tab, first_block=0):
+    """Re-hash blocks from first_block on and re-parse the ones that changed. Returns changed block indices."""
+    led = _ledger[tab]; rows = led["rows"]
+    n_blocks = (len(rows) + _LEDGER_BLOCK - 1) // _LEDGER_BLOCK
+    changed = []
+    for i in range(first_block, n_blocks):
+        block = rows[i * _LEDGER_BLOCK:(i + 1) * _LEDGER_BLOCK]
+        h = _block_hash(block)
+        if i < len(led["hashes"]):
+            if led["hashes"][i] == h: continue
+            led["hashes"][i] = h; led["entries"][i] = _parse_ledger_rows(block)
+        else:
+            led["hashes"].append(h); led["entries"].append(_parse_ledger_rows(block))
+        changed.append(i)
+    if changed or len(led["hashes"]) > n_blocks: _bump_ledger_version()
+    del led["hashes"][n_blocks:]; del led["entries"][n_blocks:]
+    return changed
+
+def _bump_ledger_version():
+    global _ledger_version
+    _ledger_version += 1
+
+def _splice_ledger(tab, at, new_rows):
+    """Write rows read from sheet row at + 2 over the local copy (caller holds _ledger_lock). Rows past
+    the end of the cache (a gap) are skipped and left for the next tail sync. Returns rows applied."""
+    led = _ledger[tab]
+    new_rows = _clean_rows(new_rows)
+    if not new_rows or at > len(led["rows"]): return 0
+    led["rows"][at:at + len(new_rows)] = new_rows
+    _rehash_ledger(tab, at // _LEDGER_BLOCK)
+    return len(new_rows)
+
+def _read_ranges_each(ranges, client):
+    """Per-range fallback for a rejected batch: one bad tail must not take down B2 or the other tabs."""
+    out = []
+    for rng in ranges:
+        try: out.append(batch_read([rng], client)[0])
+        except SheetsError as e:
+            logger.warning(f"Skipping unreadable range {rng}: {e}")
+            out.append([])
+    return out
+
+def sync_bank_data(client=None):
+    """Dashboard!B2 plus the rows appended to every ledger tab since the last read, in a single
+    batchGet (per-range reads if the batch is rejected). Returns the raw B2 value (None if blank).
+    Raises SheetsError if B2 can't be read. The ledger lock is not held across the network call."""
+    with _ledger_lock: known = {tab: len(_ledger[tab]["rows"]) for tab in LEDGER_TABS}
+    b2_range = a1(TAB_DASHBOARD, "B2")
+    # Start on the last known row (the header for an empty tab), not one past it: a grid with no spare
+    # rows (e.g. a Forms response tab) rejects an out-of-bounds range. The overlap row is dropped.
+    tail_ranges = [a1(tab, f"A{known[tab] + 1}:E") for tab in LEDGER_TABS]
+    try: b2, *tails = batch_read([b2_range] + tail_ranges, client)
+    except SheetsError as e:
+        if e.kind != "fatal": raise
+        logger.warning(f"Bank batch read rejected, falling back to per-range reads: {e}")
+        b2 = batch_read([b2_range], client)[0]
+        tails = _read_ranges_each(tail_ranges, client)
+    with _ledger_lock:
+        for tab, rows in zip(LEDGER_TABS, tails):
+            if known[tab] and _clean_rows(rows[:1]) != _ledger[tab]["rows"][known[tab] - 1:known[tab]]:
+                logger.warning(f"Ledger tail for '{tab}' no longer lines up at row {known[tab] + 1}; the reconciler will repair it")
+            _splice_ledger(tab, known[tab], rows[1:])
+    return b2[0][0] if b2 and b2[0] else None
+
+def reconcile_ledger(client=None):
+    """Full re-read of every ledger tab (one batchGet), patching only blocks whose content hash differs. Returns blocks patched."""
+    if not client: client = get_gspread_client()
+    if not client: return 0
+    try: tabs = batch_read([a1(tab, "A2:E") for tab in LEDGER_TABS], client)
+    except Exception as e:
+        logger.error(f"Ledger reconcile error: {e}")
         return 0
+    patched = 0
+    for tab, rows in zip(LEDGER_TABS, tabs):
+        with _ledger_lock:
+            _ledger[tab]["rows"] = _clean_rows(rows)
+            changed = _rehash_ledger(tab)
+        if changed: logger.info(f"Ledger reconcile: '{tab}' blocks {changed} changed")
+        patched += len(changed)
+    return patched
+
+def ledger_entries():
+    with _ledger_lock: return [e for tab in LEDGER_TABS for block in _ledger[tab]["entries"] for e in block]
 
 # --- CACHED FINANCIAL DATA ---
-_financial_cache = None
-_financial_cache_time = 0
 _FINANCIAL_TTL = 300  # Cache financial data for 5 minutes
+_fin_cache = Cache("financials", ttl=_FINANCIAL_TTL, maxsize=1, invalidated_by=("ledger_write",))
 
-def get_financial_detailed(force=False):
-    global _financial_cache, _financial_cache_time
-    now = time.time()
-    if not force and _financial_cache and (now - _financial_cache_time) < _FINANCIAL_TTL:
-        return _financial_cache
-    client = get_gspread_client()
-    if not client: return _financial_cache  # Return stale cache if available
+_stats_seq = itertools.count(1)
+
+def build_financial_stats(gbank_val="Error"):
+    """Aggregate today/week/month and category stats from the local ledger."""
     stats = {
-        "gbank_val": "Error", "today": {"in": 0, "out": 0, "net": 0},
+        "version": next(_stats_seq), "gbank_val": gbank_val, "today": {"in": 0, "out": 0, "net": 0},
         "week": {"in": 0, "out": 0, "net": 0}, "month": {"in": 0, "out": 0, "net": 0},
         "top_categories": "None", "breakdown": defaultdict(int), "last_5": []     
     }
+    now = get_gb_time()
+    today_date = stats["date"] = now.date()  # The day the today/week/month windows were cut for
+    start_week = (now - timedelta(days=now.weekday())).date()
+    start_month = now.replace(day=1).date()
+    category_tracker = defaultdict(int) 
+    total_income_all_time = 0
+
+    all_entries = ledger_entries()
+    all_entries.sort(key=lambda x: x['ts'], reverse=True)
+    stats["last_5"] = all_entries[:5]
+
+    for e in all_entries:
+        d = e['ts'].date(); val = e['gold']; is_in = val > 0
+        if is_in: category_tracker[e['type']] += val; total_income_all_time += val
+        if d == today_date:
+            if is_in: stats["today"]["in"] += val
+            else: stats["today"]["out"] += val
+            stats["breakdown"][e['type']] += val
+        if d >= start_week:
+            if is_in: stats["week"]["in"] += val
+            else: stats["week"]["out"] += val
+        if d >= start_month:
+            if is_in: stats["month"]["in"] += val
+            else: stats["month"]["out"] += val
+
+    stats["today"]["net"] = stats["today"]["in"] + stats["today"]["out"]
+    stats["week"]["net"] = stats["week"]["in"] + stats["week"]["out"]
+    stats["month"]["net"] = stats["month"]["in"] + stats["month"]["out"]
+    if category_tracker and total_income_all_time > 0:
+        sorted_cats = sorted(category_tracker.items(), key=lambda item: item[1], reverse=True)
+        stats["top_categories"] = " | ".join([f"{n} ({(v/total_income_all_time)*100:.1f}%)" for n,v in sorted_cats[:3]])
+    return stats
+
+# Change probe: before downloading anything, compare the spreadsheet's Drive modifiedTime with the
+# one seen at the last full refresh. Unchanged -> keep the snapshot (and renew its age). A full
+# refresh still happens at least every _PROBE_MAX_SKIP seconds in case modifiedTime lags.
+_PROBE_MAX_SKIP = 1800
+_probe = {"modified": None, "full_at": 0}
+refresh_counters = {"probes": 0, "skipped": 0, "full": 0, "probe_errors": 0}
+
+def sheet_modified_time(client=None):
+    return sheets_call(lambda: get_workbook(client).get_lastUpdateTime(), label="probe")
+
+def get_financial_detailed(force=False):
+    if not force:
+        stats = _fin_cache.get("stats")
+        if stats: return stats
+    cached, cached_at = _fin_cache.peek("stats")
+    client = get_gspread_client() if sheets_healthy() else None
+    if not client:
+        # Sheets unhealthy: serve the last good data, clearly marked stale
+        if cached: cached["stale"] = True
+        return cached
+    modified = None
+    refresh_counters["probes"] += 1
+    try: modified = sheet_modified_time(client)
+    except Exception as e:
+        refresh_counters["probe_errors"] += 1; logger.warning(f"Change probe failed: {e}")
+    if (cached and not cached.get("stale") and modified and modified == _probe["modified"]
+            and time.time() - _probe["full_at"] < _PROBE_MAX_SKIP):
+        refresh_counters["skipped"] += 1
+        if cached.get("date") != get_gb_time().date():  # Past midnight: re-cut the windows from the local ledger
+            cached = build_financial_stats(cached["gbank_val"]); cached["stale"] = False
+        _fin_cache.set("stats", cached)  # Confirmed current
+        return cached
+    refresh_counters["full"] += 1
+    stale = False
+    gbank_val = cached["gbank_val"] if cached else "Error"
     try:
-        wb = client.open(SHEET_NAME)
-        try: stats["gbank_val"] = wb.worksheet(TAB_DASHBOARD).acell('B2').value
-        except: pass
-        now = get_gb_time()
-        today_date = now.date()
-        start_week = (now - timedelta(days=now.weekday())).date()
-        start_month = now.replace(day=1).date()
-        all_entries = []
-        category_tracker = defaultdict(int) 
-        total_income_all_time = 0
-
-        def parse_tab(tab_name):
-            try:
-                rows = wb.worksheet(tab_name).get_all_values()[1:]
-                for r in rows:
-                    if len(r) < 4: continue
-                    ts = parse_sheet_timestamp(r[0])
-                    if not ts: continue
-                    try:
-                        gold = int(str(r[3]).lower().replace('g','').replace(',','').strip())
-                        t_key = r[2] or "Unknown"
-                        all_entries.append({"ts": ts, "player": r[1], "type": t_key, "gold": gold, "desc": r[4] if len(r)>4 else ""})
-                    except: continue
-            except: pass
-
-        parse_tab(TAB_DISCORD)
-        parse_tab(TAB_FORM)
-        parse_tab(TAB_OLD)
-        all_entries.sort(key=lambda x: x['ts'], reverse=True)
-        stats["last_5"] = all_entries[:5]
-
-        for e in all_entries:
-            d = e['ts'].date(); val = e['gold']; is_in = val > 0
-            if is_in: category_tracker[e['type']] += val; total_income_all_time += val
-            if d == today_date:
-                if is_in: stats["today"]["in"] += val
-                else: stats["today"]["out"] += val
-                stats["breakdown"][e['type']] += val
-            if d >= start_week:
-                if is_in: stats["week"]["in"] += val
-                else: stats["week"]["out"] += val
-            if d >= start_month:
-                if is_in: stats["month"]["in"] += val
-                else: stats["month"]["out"] += val
-
-        stats["today"]["net"] = stats["today"]["in"] + stats["today"]["out"]
-        stats["week"]["net"] = stats["week"]["in"] + stats["week"]["out"]
-        stats["month"]["net"] = stats["month"]["in"] + stats["month"]["out"]
-        if category_tracker and total_income_all_time > 0:
-            sorted_cats = sorted(category_tracker.items(), key=lambda item: item[1], reverse=True)
-            stats["top_categories"] = " | ".join([f"{n} ({(v/total_income_all_time)*100:.1f}%)" for n,v in sorted_cats[:3]])
-        else: stats["top_categories"] = "None"
-    except Exception as e: logger.error(f"Fin stats error: {e}")
-    _financial_cache = stats
-    _financial_cache_time = time.time()
+        b2 = sync_bank_data(client)
+        set_local_gbank(parse_gold(b2))
+        gbank_val = b2
+    except Exception as e:
+        logger.error(f"Fin stats error: {e}"); stale = True
+    stats = build_financial_stats(gbank_val)
+    stats["stale"] = stale
+    _fin_cache.set("stats", stats, stored_at=cached_at if stale else None)  # A stale fetch keeps the old age
+    if not stale:  # Probed before the fetch, so an edit landing mid-fetch still shows up next time
+        _probe["modified"], _probe["full_at"] = modified, time.time()
     return stats
 
+def replace_financial_stats(stats):
+    """Swap in stats rebuilt from the local ledger (no sheet read), keeping the snapshot's age and stale flag."""
+    cached, cached_at = _fin_cache.peek("stats")
+    if cached: stats["stale"] = cached.get("stale", False)
+    _fin_cache.set("stats", stats, stored_at=cached_at)
+
+def financial_cache_time(): return _fin_cache.peek("stats")[1]
+
+# --- BACKGROUND FINANCIAL REFRESH (STALE-WHILE-REVALIDATE) ---
+# Readers always get the current snapshot immediately; financial_refresher renews it before the
+# TTL runs out, and concurrent refresh requests share a single in-flight fetch.
+_FINANCIAL_REFRESH_MARGIN = 60  # Refresh this many seconds before the TTL expires
+
+def get_financial_snapshot():
+    """Returns (stats, age_seconds) without touching the sheet; (None, None) before the first load.
+    After an invalidation (e.g. a ledger write) the age is infinite, so the next check refreshes."""
+    stats, age, _ = _fin_cache.lookup("stats")
+    return (stats, age) if stats else (None, None)
+
+async def refresh_financials():
+    """Force a refresh off-loop. If one is already running, wait for that one instead of starting another."""
+    return await _fin_cache.single_flight("stats", lambda: run_blocking(get_financial_detailed, True))
+
+async def get_financials():
+    """Snapshot if we have one (however old), otherwise wait for the first load."""
+    stats, _ = get_financial_snapshot()
+    return stats if stats else await refresh_financials()
+
+# --- BANK CHARTS ---
+# Optional PNG charts for /bank (requires: pip install matplotlib, plus charts.py next to bot.py).
+# Series are aggregated from the parsed ledger in a thread and rasterized by charts.py in a freshly
+# exec'd worker process, so drawing never runs on the gateway loop, the worker inherits none of our
+# threads or locks, and (unlike a spawn/forkserver pool) never re-imports bot.py and its logging setup.
+# Renders are cached per (chart, ledger version, day) until the ledger changes.
+CHARTS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "charts.py")
+CHARTS_AVAILABLE = importlib.util.find_spec("matplotlib") is not None and os.path.exists(CHARTS_SCRIPT)
+_CHART_DAYS = 14
+_CHART_WINDOW_DAYS = 30  # Category and player charts cover the last 30 days
+_CHART_TIMEOUT = 30
+_chart_cache = Cache("charts", maxsize=12)
+
+def ledger_version():
+    return _ledger_version  # Bumped under _ledger_lock; an int read needs no lock
+
+def chart_series():
+    """{chart: plain-data series} from the local ledger, small enough to hand to the worker as JSON."""
+    today = get_gb_time().date()
+    days = [today - timedelta(days=i) for i in range(_CHART_DAYS - 1, -1, -1)]
+    daily_in, daily_out = defaultdict(int), defaultdict(int)
+    cats, players = defaultdict(int), defaultdict(int)
+    window_start = today - timedelta(days=_CHART_WINDOW_DAYS)
+    for e in ledger_entries():
+        d = e["ts"].date(); val = e["gold"]
+        if val > 0: daily_in[d] += val
+        else: daily_out[d] += val
+        if d > window_start and val > 0:
+            cats[e["type"]] += val; players[e["player"]] += val
+    top_players = sorted(players.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    top_cats = sorted(cats.items(), key=lambda kv: kv[1], reverse=True)
+    if len(top_cats) > 6: top_cats = top_cats[:5] + [("Other", sum(v for _, v in top_cats[5:]))]
+    return {
+        "daily": ([d.strftime("%d/%m") for d in days], [daily_in[d] for d in days], [daily_out[d] for d in days]),
+        "categories": ([k for k, _ in top_cats], [v for _, v in top_cats]),
+        "players": ([k for k, _ in top_players], [v for _, v in top_players]),
+    }
+
+async def _run_chart_worker(job):
+    """Render charts in a charts.py subprocess; a worker that outlives _CHART_TIMEOUT is killed. Returns {chart: png}."""
+    proc = await asyncio.create_subprocess_exec(sys.executable, CHARTS_SCRIPT, stdin=asyncio.subprocess.PIPE,
+                                                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    try: out, err = await asyncio.wait_for(proc.communicate(json.dumps(job).encode()), _CHART_TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill(); await proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise RuntimeError(f"chart worker exited {proc.returncode}: {err.decode(errors='replace').strip()[-300:]}")
+    return pickle.loads(out)
+
+async def render_bank_charts():
+    """[(filename, png bytes)] for every chart, reusing cached renders while the ledger is unchanged."""
+    if not CHARTS_AVAILABLE: return []
+    version = (ledger_version(), get_gb_time().date())
+    missing = [c for c in ("daily", "categories", "players") if _chart_cache.get((c, version)) is None]
+    if missing:
+        series = await run_blocking(chart_series)
+        try: pngs = await _run_chart_worker({"window_days": _CHART_WINDOW_DAYS, "charts": {c: series[c] for c in missing}})
+        except asyncio.TimeoutError:
+            logger.error(f"Chart rendering timed out after {_CHART_TIMEOUT}s, worker killed")
+            return []
+        except Exception as e:
+            logger.error(f"Chart rendering failed: {e!r}")
+            return []
+        for c in missing: _chart_cache.set((c, version), pngs[c])
+    return [(f"{c}.png", _chart_cache.peek((c, version))[0]) for c in ("daily", "categories", "players")]
+
 # --- TIMER LOGIC ---
 def make_standard_command(name):
     async def wrapper(ctx):
@@ -373,11 +1376,237 @@ async def start_timer_execution(ctx_or_int, unique_id, duration, display_name=No
     state['timers'][unique_id] = {
         "end_time": end_time, "channel_id": PINNED_CHANNEL_ID, "status": "running", "display": display_name, "hidden": hidden
     }
-    save_state(state)
+    save_state(state, "timers")
     await update_dashboards()
     user_name = ctx_or_int.user.display_name if hasattr(ctx_or_int, "user") else ctx_or_int.author.display_name
     await log_to_channel("Timer Started", f"**{display_name}** started by {user_name}\nEnds: <t:{end_time}:f>", discord.Color.green())
 
+# --- RECURRING JOBS ---
+# Cron-style (Europe/London wall time) and fixed-interval jobs persisted in state["jobs"].
+# Each job has its own task that sleeps until its next due time; no per-minute polling.
+_JOB_MAX_SLEEP = 3600        # Re-check at least hourly in case the host clock jumps
+_JOB_MISFIRE_GRACE = 120     # Fires later than this (e.g. after a restart) count as late
+DEFAULT_MOTD_JOBS = [
+    ("motd_fri", "30 4 * * 5", "Pick DS quest AT today"),
+    ("motd_sat", "30 4 * * 6", "Fish AT today\nDGS AT today\nLib AT today"),
+    ("motd_sun", "30 4 * * 0", "Anth AT today"),
+    ("motd_clear", "30 4 * * 1-4", ""),
+]
+_job_tasks = {}
+
+def _parse_cron_field(field, lo, hi):
+    values = set()
+    for part in field.split(','):
+        rng, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if rng == '*': start, end = lo, hi
+        elif '-' in rng: start, end = map(int, rng.split('-'))
+        else: start = int(rng); end = hi if step > 1 else start
+        if start < lo or end > hi or start > end or step < 1: raise ValueError(f"Bad cron field '{field}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+def parse_cron(spec):
+    """'min hour day month weekday' (weekday 0/7 = Sunday). Raises ValueError on bad specs."""
+    fields = spec.split()
+    if len(fields) != 5: raise ValueError("Cron needs 5 fields: min hour day month weekday")
+    dows = {d % 7 for d in _parse_cron_field(fields[4], 0, 7)}
+    return (_parse_cron_field(fields[0], 0, 59), _parse_cron_field(fields[1], 0, 23),
+            _parse_cron_field(fields[2], 1, 31), _parse_cron_field(fields[3], 1, 12), dows,
+            fields[2] == '*', fields[4] == '*')
+
+def _gap_end(naive):
+    """First valid GB instant after a wall time that falls in the spring-forward gap (transitions are on the minute)."""
+    while True:
+        naive += timedelta(minutes=1)
+        try: return GB_TZ.localize(naive, is_dst=None)
+        except pytz.NonExistentTimeError: continue
+
+def cron_next(spec, after_ts):
+    """Next fire time strictly after after_ts, in GB wall time. Times skipped by the spring-forward
+    gap fire when it ends (02:00 BST, once even if several fall inside it); times repeated at
+    fall-back fire once (first occurrence)."""
+    mins, hours, doms, months, dows, dom_any, dow_any = parse_cron(spec)
+    day = datetime.fromtimestamp(after_ts, GB_TZ).date()
+    for _ in range(366 * 5):
+        cron_dow = (day.weekday() + 1) % 7
+        if dom_any or dow_any: day_ok = (day.day in doms) and (cron_dow in dows)
+        else: day_ok = (day.day in doms) or (cron_dow in dows)
+        if day.month in months and day_ok:
+            for h in sorted(hours):
+                for m in sorted(mins):
+                    naive = datetime(day.year, day.month, day.day, h, m)
+                    try: dt = GB_TZ.localize(naive, is_dst=None)
+                    except pytz.NonExistentTimeError: dt = _gap_end(naive)
+                    except pytz.AmbiguousTimeError: dt = GB_TZ.localize(naive, is_dst=True)
+                    if dt.timestamp() > after_ts: return int(dt.timestamp())
+        day += timedelta(days=1)
+    raise ValueError(f"Cron spec '{spec}' never fires")
+
+def job_next_run(job, after_ts):
+    if job["kind"] == "cron": return cron_next(job["spec"], after_ts)
+    return int(after_ts + job["spec"])
+
+def make_job(kind, spec, action, created_by="system", **extra):
+    job = {"kind": kind, "spec": spec, "action": action, "created_by": created_by, "last_run": 0}
+    job.update(extra)
+    job["next_run"] = job_next_run(job, time.time())
+    return job
+
+def _next_job_id(jobs, prefix):
+    count = 1
+    while f"{prefix}{count}" in jobs: count += 1
+    return f"{prefix}{count}"
+
+def describe_job(job_id, job):
+    sched = f"cron `{job['spec']}`" if job["kind"] == "cron" else f"every {job.get('label', str(timedelta(seconds=job['spec'])))}"
+    detail = job.get("link") or job.get("message") or "_(clear)_"
+    return f"• `{job_id}` {job['action']} ({sched}) → {detail.splitlines()[0]} | next <t:{job['next_run']}:R>"
+
+def seed_jobs(state):
+    """Install the default MOTD jobs once and migrate the legacy single state['bump'] slot."""
+    jobs = state.setdefault("jobs", {})
+    if not state.get("jobs_seeded"):
+        for job_id, spec, msg in DEFAULT_MOTD_JOBS:
+            if job_id not in jobs: jobs[job_id] = make_job("cron", spec, "motd", message=msg)
+        state["jobs_seeded"] = True
+    legacy = state.pop("bump", None)
+    if legacy and legacy.get("link") and legacy.get("interval"):
+        jobs[_next_job_id(jobs, "bump")] = {
+            "kind": "interval", "spec": legacy["interval"], "action": "bump", "link": legacy["link"],
+            "label": legacy.get("timer_str", ""), "created_by": "migration",
+            "last_run": legacy.get("last_run", 0), "next_run": legacy.get("last_run", 0) + legacy["interval"]
+        }
+    save_state(state, "jobs", "jobs_seeded", "bump")
+
+async def run_job(job_id, job, late):
+    action = job["action"]
+    chan = bot.get_channel(PINNED_CHANNEL_ID)
+    if action == "motd":
+        # A late MOTD (e.g. after downtime) only applies if it is still the day it was due
+        due_day = datetime.fromtimestamp(job["next_run"], GB_TZ).date()
+        if late and due_day != get_gb_time().date(): return
+        state = load_state()
+        state["motd"] = job.get("message", "")
+        save_state(state, "motd")
+        if chan and state["motd"] and not late: await chan.send(f"📢 **DAILY REMINDER**\n{state['motd']}")
+        await update_dashboards(skip_financials=True)
+    elif action == "bump":
+        if chan: await chan.send(f"🔔 **BUMPY TIME!**\n{get_ping_string()} - Time to bump!\nThread: {job['link']}")
+    elif action == "reminder":
+        if chan: await chan.send(f"⏰ **REMINDER:** {job.get('message', '')} {get_ping_string()}")
+
+async def fire_job(job_id):
+    """Run a due job and schedule its next occurrence. Returns False if the job no longer exists."""
+    state = load_state()
+    job = state.get("jobs", {}).get(job_id)
+    if not job: return False
+    try: await run_job(job_id, job, late=(time.time() - job["next_run"] > _JOB_MISFIRE_GRACE))
+    except Exception as e: logger.error(f"Job {job_id} error: {e}")
+    if job_id not in state.get("jobs", {}): return False  # Removed while running
+    now = time.time()
+    job["last_run"] = int(now)
+    job["next_run"] = job_next_run(job, now)
+    save_state(state, "jobs")
+    return True
+
+async def _job_sleeper(job_id):
+    while True:
+        job = load_state().get("jobs", {}).get(job_id)
+        if not job: return
+        delay = job["next_run"] - time.time()
+        if delay > 0:
+            await asyncio.sleep(min(delay, _JOB_MAX_SLEEP))
+            continue
+        if not await fire_job(job_id): return
+
+def schedule_job(job_id):
+    unschedule_job(job_id)
+    _job_tasks[job_id] = asyncio.create_task(_job_sleeper(job_id))
+
+def unschedule_job(job_id):
+    task = _job_tasks.pop(job_id, None)
+    if task: task.cancel()
+
+def start_scheduler():
+    state = load_state()
+    seed_jobs(state)
+    for job_id in state["jobs"]:
+        task = _job_tasks.get(job_id)
+        if not task or task.done(): schedule_job(job_id)
+
+def add_job(job_id, job):
+    state = load_state()
+    state["jobs"][job_id] = job
+    save_state(state, "jobs")
+    schedule_job(job_id)
+
+def remove_job(job_id):
+    state = load_state()
+    if job_id not in state["jobs"]: return False
+    del state["jobs"][job_id]
+    save_state(state, "jobs")
+    unschedule_job(job_id)
+    return True
+
+# --- DEMO FORUM INDEX ---
+# DEMO_FORUM_ID threads keyed by normalized location, kept current from thread gateway events and
+# persisted in state["forum_threads"] ({thread_id: name}). The archive is paged once, the first time.
+_forum_index = {}  # location key -> thread id (newest thread wins)
+_forum_index_ready = False
+
+def normalize_location(text): return re.sub(r'[^a-z0-9]+', '', text.lower())
+
+def _thread_keys(name):
+    """Location keys for a thread name: every ' - ' segment that isn't a date ("Bridgewater - 20/11")."""
+    return {normalize_location(p) for p in name.split(" - ") if p.strip() and not re.fullmatch(r'\s*\d{1,2}/\d{1,2}(/\d{2,4})?\s*', p)} - {""}
+
+def _rebuild_forum_index():
+    _forum_index.clear()
+    for tid, name in sorted(load_state().get("forum_threads", {}).items(), key=lambda kv: int(kv[0])):
+        for key in _thread_keys(name): _forum_index[key] = int(tid)
+
+def index_forum_thread(thread):
+    if getattr(thread, "parent_id", None) != DEMO_FORUM_ID: return
+    state = load_state(); threads = state.setdefault("forum_threads", {})
+    if threads.get(str(thread.id)) == thread.name: return
+    threads[str(thread.id)] = thread.name
+    save_state(state, "forum_threads"); _rebuild_forum_index()
+
+def unindex_forum_thread(thread_id):
+    state = load_state()
+    if state.get("forum_threads", {}).pop(str(thread_id), None) is None: return
+    save_state(state, "forum_threads"); _rebuild_forum_index()
+
+def find_demo_thread(location):
+    if not _forum_index_ready and not _forum_index: _rebuild_forum_index()
+    return _forum_index.get(normalize_location(location))
+
+async def load_forum_index():
+    """Build the index from persisted state plus the cached active threads; page the archive only once ever."""
+    global _forum_index_ready
+    state = load_state()
+    forum = bot.get_channel(DEMO_FORUM_ID)
+    if not isinstance(forum, discord.ForumChannel): return
+    threads = state.setdefault("forum_threads", {})
+    for thread in forum.threads: threads[str(thread.id)] = thread.name
+    if not state.get("forum_index_seeded"):
+        try:
+            async for thread in forum.archived_threads(limit=None): threads[str(thread.id)] = thread.name
+            state["forum_index_seeded"] = True
+        except Exception as e: logger.error(f"Forum index backfill failed: {e}")
+    save_state(state, "forum_threads", "forum_index_seeded"); _rebuild_forum_index()
+    _forum_index_ready = True
+    logger.info(f"Forum index: {len(threads)} threads, {len(_forum_index)} locations")
+
+@bot.event
+async def on_thread_create(thread): index_forum_thread(thread)
+@bot.event
+async def on_thread_update(before, after): index_forum_thread(after)
+@bot.event
+async def on_raw_thread_delete(payload):
+    if payload.parent_id == DEMO_FORUM_ID: unindex_forum_thread(payload.thread_id)
+
 # --- COMMANDS ---
 @bot.command(name="update")
 async def manual_update_check(ctx):
@@ -396,7 +1625,7 @@ async def manual_update_check(ctx):
                 await msg.edit(content="✅ Update found! Overwriting and restarting...")
                 await log_to_channel("Manual Update", f"Update triggered by {ctx.author.name}", discord.Color.purple())
                 with open(__file__, 'w', encoding='utf-8') as f: f.write(new_code)
-                os.execv(sys.executable, ['python'] + sys.argv)
+                await restart_process()
             else:
                 await msg.edit(content=f"✅ System is up to date.\nLocal Lines: {len(current_code.splitlines())}\nRemote Lines: {len(new_code.splitlines())}")
         else:
@@ -440,71 +1669,96 @@ async def create_timer(ctx, name: str=None, duration: str=None):
     if parse_duration_string(duration) is None: return await ctx.send("❌ Invalid time.")
     state = load_state()
     state["custom_cmds"][name] = duration
-    save_state(state)
+    save_state(state, "custom_cmds")
     if name in bot.all_commands: bot.remove_command(name)
     bot.add_command(make_custom_command(name, duration))
     await ctx.send(f"✅ Created **!{name}** ({duration})")
     await log_to_channel("Command Created", f"**!{name}** created with duration {duration} by {ctx.author.name}", discord.Color.blue())
 
-@bot.command(name="dt")
-async def delete_timer(ctx, name: str=None):
-    if not name: return await ctx.send("❌ Usage: `!dt [name]`")
+def find_timer_key(timers, name):
+    """Timer key matching `name` case-insensitively (demo keys keep the location's case, e.g. demo_Bridge_main)."""
+    if name in timers: return name
     name = name.lower()
+    return next((k for k in timers if k.lower() == name), None)
+
+def demo_key_location(key):
+    """Location part of a demo timer key (demo_{location}_{label}), or None for non-demo keys."""
+    if not key.startswith("demo_") or "_" not in key[5:]: return None
+    return key[5:].rsplit("_", 1)[0]
+
+def is_demo_at(key, location):
+    """Whether `key` is a demo timer for exactly `location` (so "bridge" doesn't match demo_bridge_north_*)."""
+    loc = demo_key_location(key)
+    return loc is not None and normalize_location(loc) == normalize_location(location)
+
+# Shared by the prefix commands and their slash equivalents; each returns the reply text.
+async def delete_timer_entry(name, actor):
     state = load_state()
     deleted = False
-    if name in state["custom_cmds"]:
+    if name.lower() in state["custom_cmds"]:
+        name = name.lower()
         del state["custom_cmds"][name]; deleted=True
         if name in bot.all_commands: bot.remove_command(name)
-    to_del = [k for k in state["timers"] if k == name]
-    for k in to_del: del state["timers"][k]; deleted=True
-    if deleted:
-        save_state(state)
-        await update_dashboards()
-        await ctx.send(f"🗑️ Deleted **!{name}**")
-        await log_to_channel("Timer Deleted", f"**{name}** deleted by {ctx.author.name}", discord.Color.red())
-    else: await ctx.send("❌ Not found.")
+    key = find_timer_key(state["timers"], name)
+    if key: del state["timers"][key]; deleted=True; name = key
+    if not deleted: return "❌ Not found."
+    save_state(state, "custom_cmds", "timers")
+    await update_dashboards()
+    await log_to_channel("Timer Deleted", f"**{name}** deleted by {actor}", discord.Color.red())
+    return f"🗑️ Deleted **!{name}**"
 
-@bot.command(name="rt")
-async def reset_timer(ctx, name: str=None):
-    if not name: return await ctx.send("❌ Usage: `!rt [name]`")
-    name = name.lower()
+async def reset_timer_entry(name, actor):
     state = load_state()
-    if name in state["timers"]:
-        del state["timers"][name]
-        save_state(state)
-        await update_dashboards()
-        await ctx.send(f"🔄 Timer **{name}** reset.")
-        await log_to_channel("Timer Reset", f"**{name}** reset manually by {ctx.author.name}", discord.Color.orange())
-    else: await ctx.send(f"❌ Active/Done timer **{name}** not found.")
+    key = find_timer_key(state["timers"], name)
+    if not key: return f"❌ Active/Done timer **{name}** not found."
+    name = key
+    del state["timers"][name]
+    save_state(state, "timers")
+    await update_dashboards()
+    await log_to_channel("Timer Reset", f"**{name}** reset manually by {actor}", discord.Color.orange())
+    return f"🔄 Timer **{name}** reset."
 
-@bot.command(name="et")
-async def edit_timer(ctx, name: str=None, duration: str=None):
-    if not name or not duration: return await ctx.send("❌ Usage: `!et [name] [time]`")
+async def edit_timer_entry(name, duration, actor):
     name = name.lower()
-    if parse_duration_string(duration) is None: return await ctx.send("❌ Invalid time.")
+    if parse_duration_string(duration) is None: return "❌ Invalid time."
     state = load_state()
     if name in STANDARD_DEFAULTS:
         state["standard_overrides"][name] = duration
-        save_state(state)
+        save_state(state, "standard_overrides")
         if name in bot.all_commands: bot.remove_command(name)
         bot.add_command(make_standard_command(name))
-        await ctx.send(f"✏️ Updated standard **!{name}**")
+        msg = f"✏️ Updated standard **!{name}**"
     elif name in state["custom_cmds"]:
         state["custom_cmds"][name] = duration
-        save_state(state)
+        save_state(state, "custom_cmds")
         if name in bot.all_commands: bot.remove_command(name)
         bot.add_command(make_custom_command(name, duration))
-        await ctx.send(f"✏️ Updated custom **!{name}**")
-    else: await ctx.send("❌ Not found.")
-    await log_to_channel("Command Edited", f"**!{name}** duration changed to {duration} by {ctx.author.name}", discord.Color.blue())
+        msg = f"✏️ Updated custom **!{name}**"
+    else: msg = "❌ Not found."
+    await log_to_channel("Command Edited", f"**!{name}** duration changed to {duration} by {actor}", discord.Color.blue())
+    return msg
+
+@bot.command(name="dt")
+async def delete_timer(ctx, name: str=None):
+    if not name: return await ctx.send("❌ Usage: `!dt [name]`")
+    await ctx.send(await delete_timer_entry(name, ctx.author.name))
+
+@bot.command(name="rt")
+async def reset_timer(ctx, name: str=None):
+    if not name: return await ctx.send("❌ Usage: `!rt [name]`")
+    await ctx.send(await reset_timer_entry(name, ctx.author.name))
+
+@bot.command(name="et")
+async def edit_timer(ctx, name: str=None, duration: str=None):
+    if not name or not duration: return await ctx.send("❌ Usage: `!et [name] [time]`")
+    await ctx.send(await edit_timer_entry(name, duration, ctx.author.name))
 
 @bot.command(name="setrow")
 async def set_row(ctx, row: int=None):
     if not row: return await ctx.send("❌ Usage: `!setrow [number]`")
-    state = load_state()
-    old_row = state.get("last_form_row", 1)
-    state["last_form_row"] = row
-    save_state(state)
+    async with state_txn("last_form_row") as txn:
+        old_row = txn["last_form_row"] or 1
+        txn["last_form_row"] = row
     await ctx.send(f"🛠 Row count changed from `{old_row}` to `{row}`.")
     await log_to_channel("Row Updated", f"Changed from {old_row} to {row} by {ctx.author.name}", discord.Color.orange())
 
@@ -521,20 +1775,6 @@ async def migrate_demos(ctx):
     if not main_demos:
         return await ctx.send("❌ No active demos found to migrate.")
     
-    # Build a lookup of forum threads by location keyword
-    thread_lookup = {}
-    forum = bot.get_channel(DEMO_FORUM_ID)
-    if forum and isinstance(forum, discord.ForumChannel):
-        # Active (non-archived) threads
-        for thread in forum.threads:
-            thread_lookup[thread.name.lower()] = thread.id
-        # Also check recently archived threads
-        try:
-            async for thread in forum.archived_threads(limit=50):
-                thread_lookup[thread.name.lower()] = thread.id
-        except Exception:
-            pass
-    
     migrated_count = 0
     linked_count = 0
     for demo_key, demo_data in main_demos.items():
@@ -548,11 +1788,7 @@ async def migrate_demos(ctx):
         # --- Thread linking: find matching forum thread ---
         thread_id = demo_data.get('thread_id')
         if not thread_id:
-            # Search thread names for the location keyword
-            for thread_name, tid in thread_lookup.items():
-                if location.lower() in thread_name:
-                    thread_id = tid
-                    break
+            thread_id = find_demo_thread(location)
             if thread_id:
                 linked_count += 1
         
@@ -560,7 +1796,7 @@ async def migrate_demos(ctx):
         demo_data['thread_id'] = thread_id
         
         # Delete old alert timers (3h, 1h, 10m, and any other variants)
-        old_alerts = [k for k in timers.keys() if k.startswith(f"demo_{location}_") and k != demo_key]
+        old_alerts = [k for k in timers.keys() if demo_key_location(k) == location and k != demo_key]
         for old_key in old_alerts:
             del timers[old_key]
         
@@ -579,17 +1815,13 @@ async def migrate_demos(ctx):
         
         migrated_count += 1
     
-    save_state(state)
+    save_state(state, "timers")
     await update_dashboards()
     await ctx.send(f"✅ Migrated {migrated_count} demo(s) to new alert schedule.\n🔗 Linked {linked_count} demo(s) to forum threads.")
     await log_to_channel("Demos Migrated", f"{migrated_count} demos migrated, {linked_count} threads linked by {ctx.author.name}", discord.Color.blue())
 
-@bot.command(name="shift")
-async def shift_demos(ctx, hours: int = -1):
-    """Shift all currently running demo timers by N hours (default: -1)."""
-    if hours == 0:
-        return await ctx.send("❌ Hours cannot be 0. Example: `!shift -1`")
-
+async def shift_demo_timers(hours, actor, location=None):
+    """Shift running demo timers (all, or one location's) by N hours."""
     state = load_state()
     timers = state.get("timers", {})
     now = int(time.time())
@@ -598,7 +1830,7 @@ async def shift_demos(ctx, hours: int = -1):
     shifted = 0
     skipped = 0
     for name, data in timers.items():
-        if not name.startswith("demo_"):
+        if not (is_demo_at(name, location) if location else name.startswith("demo_")):
             continue
         if data.get("status") != "running":
             continue
@@ -610,77 +1842,252 @@ async def shift_demos(ctx, hours: int = -1):
         shifted += 1
 
     if shifted == 0:
-        return await ctx.send("❌ No active demo timers found to shift.")
+        return "❌ No active demo timers found to shift."
 
-    save_state(state)
+    save_state(state, "timers")
     await update_dashboards()
 
     direction = "forward" if hours > 0 else "back"
-    await ctx.send(
-        f"✅ Shifted {shifted} active demo timer(s) {abs(hours)} hour(s) {direction}."
-        + (f"\n⚠️ Skipped {skipped} timer(s) already due/past due." if skipped else "")
-    )
     await log_to_channel(
         "Demos Shifted",
-        f"{ctx.author.name} shifted {shifted} active demo timer(s) by {hours} hour(s).",
+        f"{actor} shifted {shifted} active demo timer(s){f' at {location}' if location else ''} by {hours} hour(s).",
         discord.Color.orange()
     )
+    return (
+        f"✅ Shifted {shifted} active demo timer(s) {abs(hours)} hour(s) {direction}."
+        + (f"\n⚠️ Skipped {skipped} timer(s) already due/past due." if skipped else "")
+    )
+
+@bot.command(name="shift")
+async def shift_demos(ctx, hours: int = -1):
+    """Shift all currently running demo timers by N hours (default: -1)."""
+    if hours == 0:
+        return await ctx.send("❌ Hours cannot be 0. Example: `!shift -1`")
+    await ctx.send(await shift_demo_timers(hours, ctx.author.name))
+
+@bot.command(name="remind")
+async def add_reminder(ctx, kind: str=None, spec: str=None, *, message: str=None):
+    """Add a recurring reminder: !remind every 2h [msg] | !remind cron "30 4 * * 5" [msg]"""
+    usage = "❌ Usage: `!remind every [duration] [message]` or `!remind cron \"[min hour day month weekday]\" [message]`"
+    if kind not in ("every", "cron") or not spec or not message: return await ctx.send(usage)
+    if kind == "every":
+        dur = parse_duration_string(spec)
+        if not dur or dur.total_seconds() < 60: return await ctx.send("❌ Interval must be a valid duration of at least 1m.")
+        job = make_job("interval", int(dur.total_seconds()), "reminder", ctx.author.name, message=message, label=spec)
+    else:
+        try: job = make_job("cron", spec, "reminder", ctx.author.name, message=message)
+        except ValueError as e: return await ctx.send(f"❌ Invalid cron: {e}")
+    job_id = _next_job_id(load_state()["jobs"], "rem")
+    add_job(job_id, job)
+    await ctx.send(f"✅ Reminder `{job_id}` added. Next: <t:{job['next_run']}:f>")
+    await log_to_channel("Reminder Added", f"`{job_id}` ({kind} {spec}) added by {ctx.author.name}: {message}", discord.Color.blue())
+
+@bot.command(name="reminders")
+async def list_reminders(ctx):
+    jobs = load_state().get("jobs", {})
+    lines = ["**⏰ Recurring Jobs**"] + [describe_job(k, v) for k, v in sorted(jobs.items(), key=lambda x: x[1]["next_run"])]
+    if not jobs: lines.append("_None_")
+    await ctx.send("\n".join(lines)[:2000])
+
+@bot.command(name="unremind")
+async def delete_reminder(ctx, job_id: str=None):
+    if not job_id: return await ctx.send("❌ Usage: `!unremind [id]` (see `!reminders`)")
+    if not remove_job(job_id): return await ctx.send(f"❌ Job `{job_id}` not found.")
+    await ctx.send(f"🗑️ Removed `{job_id}`.")
+    await log_to_channel("Reminder Removed", f"`{job_id}` removed by {ctx.author.name}", discord.Color.red())
+
+@bot.command(name="profile")
+@commands.guild_only()
+@commands.has_permissions(administrator=True)
+async def profile_cmd(ctx, seconds: int=30, mode: str="cpu"):
+    """Profile the live bot: !profile [seconds] [cpu|mem] (admin only)"""
+    global _profile_busy
+    if mode not in ("cpu", "mem") or not 1 <= seconds <= _PROFILE_MAX_SECONDS:
+        return await ctx.send(f"❌ Usage: `!profile [1-{_PROFILE_MAX_SECONDS} seconds] [cpu|mem]`")
+    if _profile_busy: return await ctx.send("❌ A profile is already running.")
+    _profile_busy = True
+    msg = await ctx.send(f"🔬 Profiling {mode} for {seconds}s...")
+    try:
+        stamp = get_gb_time().strftime("%Y%m%d-%H%M%S")
+        if mode == "cpu":
+            stats = await profile_cpu(seconds)
+            report = await run_blocking(render_cpu_report, stats)
+            ours, hottest, busy = summarize_cpu(stats)
+            embed = discord.Embed(title=f"🔬 CPU Profile ({seconds}s)", color=discord.Color.dark_teal(), timestamp=datetime.now())
+            embed.description = f"{stats.total_calls} calls, {busy * 1000:.0f}ms busy of {seconds * 1000}ms (loop + executor threads)"
+            embed.add_field(name="bot.py by cumulative", value="\n".join(ours)[:1024] or "None", inline=False)
+            embed.add_field(name="Hottest overall (self)", value="\n".join(hottest)[:1024] or "None", inline=False)
+            raw = io.BytesIO(marshal.dumps(stats.stats))
+            files = [discord.File(io.BytesIO(report.encode()), filename=f"profile-cpu-{stamp}.txt"), discord.File(raw, filename=f"profile-cpu-{stamp}.prof")]
+        else:
+            diff, current, peak = await profile_mem(seconds)
+            report = render_mem_report(diff, current, peak)
+            embed = discord.Embed(title=f"🧠 Memory Profile ({seconds}s)", color=discord.Color.dark_teal(), timestamp=datetime.now())
+            embed.description = f"Traced now: {current / 1048576:.1f} MiB | peak: {peak / 1048576:.1f} MiB"
+            top = [f"`{d.size_diff / 1024:+9.1f} KiB | {d.count_diff:+6}` {os.path.basename(d.traceback[0].filename)}:{d.traceback[0].lineno}" for d in diff[:_PROFILE_TOP_N]]
+            embed.add_field(name="Top growth by line", value="\n".join(top)[:1024] or "None", inline=False)
+            files = [discord.File(io.BytesIO(report.encode()), filename=f"profile-mem-{stamp}.txt")]
+        embed.set_footer(text=f"Requested by {ctx.author.name}")
+        channel = bot.get_channel(LOG_CHANNEL_ID)
+        if channel: await channel.send(embed=embed, files=files)
+        await msg.edit(content=f"✅ {mode.upper()} profile done, results posted to <#{LOG_CHANNEL_ID}>.")
+    except Exception as e:
+        logger.error(f"Profile failed: {e}")
+        await msg.edit(content=f"❌ Profile failed: {e}")
+    finally:
+        _profile_busy = False
+
+@profile_cmd.error
+async def profile_cmd_error(ctx, error):
+    if isinstance(error, commands.CheckFailure): return await ctx.send("❌ No permission.")
+    logger.error(f"!profile failed: {error!r}")  # A local handler suppresses discord.py's default report
+
+@bot.command(name="caches")
+async def cache_stats(ctx):
+    """Per-cache size, hit rate and load latency"""
+    lines = ["**🗃️ Caches**", "`name              size   hit%  stale   miss  loads  avg ms  evict`"]
+    for name, cache in CACHES.items():
+        st = cache.stats()
+        rate = f"{st['hit_rate'] * 100:5.1f}" if st["hit_rate"] is not None else "    -"
+        avg = f"{st['avg_load_ms']:6.1f}" if st["avg_load_ms"] is not None else "     -"
+        lines.append(f"`{name:<16}{st['size']:>6} {rate} {st['stale']:>6} {st['misses']:>6} {st['loads']:>6}  {avg} {st['evictions']:>6}`")
+    rc = refresh_counters
+    lines.append(f"Financial refresh: {rc['probes']} probes, {rc['skipped']} skipped, {rc['full']} full, {rc['probe_errors']} probe errors")
+    await ctx.send("\n".join(lines)[:2000])
+
+@bot.command(name="mem")
+async def mem_report(ctx):
+    """Resident memory and gateway cache sizes"""
+    members = sum(len(g.members) for g in bot.guilds)
+    messages = len(bot.cached_messages)
+    start = getattr(bot, "rss_at_start", 0)
+    await ctx.send(f"**🧠 Memory** ({'low-memory mode' if LOW_MEMORY else 'standard mode'})\n"
+                   f"RSS now: {rss_bytes() / 1048576:.1f} MiB | at startup: {start / 1048576:.1f} MiB\n"
+                   f"Cached: {len(bot.guilds)} guilds, {members} members, {messages} messages, {len(bot.users)} users")
+
+# --- AUTOCOMPLETE INDEX ---
+# Sorted (search key, value, label) lists per kind, rebuilt at most once per state revision, so a
+# keystroke is a bisect over the keys rather than a scan of every timer.
+_AUTOCOMPLETE_LIMIT = 25  # Discord's maximum
+_name_index_cache = Cache("autocomplete", maxsize=1)  # state revision -> index
+
+def _build_name_index(state):
+    timers, demos, cmds = [], [], []
+    for key, t in state.get("timers", {}).items():
+        label = f"{t.get('display', key)} ({key})"
+        timers.append((key.lower(), key, label))
+        if t.get("display"): timers.append((t["display"].lower(), key, label))
+        if key.startswith("demo_") and key.endswith("_main"): demos.append((key[5:-5].lower(), key[5:-5], t.get("display", key)))
+    overrides = state.get("standard_overrides", {})
+    for k, v in STANDARD_DEFAULTS.items(): cmds.append((k, k, f"!{k} ({overrides.get(k, v)})"))
+    for k, v in state.get("custom_cmds", {}).items(): cmds.append((k, k, f"!{k} ({v})"))
+    return {"timers": sorted(set(timers)), "demos": sorted(set(demos)), "cmds": sorted(set(cmds))}
+
+def lookup_names(kind, prefix):
+    """Up to 25 (value, label) pairs whose key starts with `prefix`, deduplicated by value."""
+    entries = _name_index_cache.get_or_load(_state_rev, lambda: _build_name_index(load_state()))[kind]
+    prefix = prefix.lower()
+    out, seen = [], set()
+    for key, value, label in itertools.islice(entries, bisect.bisect_left(entries, (prefix,)), None):
+        if not key.startswith(prefix) or len(out) >= _AUTOCOMPLETE_LIMIT: break
+        if value not in seen: seen.add(value); out.append((value, label))
+    return out
+
+def _choices(pairs): return [app_commands.Choice(name=label[:100], value=value[:100]) for value, label in pairs]
+
+async def timer_autocomplete(interaction: discord.Interaction, current: str): return _choices(lookup_names("timers", current))
+async def demo_autocomplete(interaction: discord.Interaction, current: str): return _choices(lookup_names("demos", current))
+async def command_autocomplete(interaction: discord.Interaction, current: str): return _choices(lookup_names("cmds", current))
+async def deletable_autocomplete(interaction: discord.Interaction, current: str):
+    customs = load_state().get("custom_cmds", {})
+    pairs = [p for p in lookup_names("cmds", current) if p[0] in customs] + lookup_names("timers", current)
+    return _choices(pairs[:_AUTOCOMPLETE_LIMIT])
 
 # --- SLASH COMMANDS ---
+@bot.tree.command(name="rt", description="Reset (clear) a timer")
+@app_commands.describe(name="Timer key")
+@app_commands.autocomplete(name=timer_autocomplete)
+async def slash_reset_timer(interaction: discord.Interaction, name: str):
+    await interaction.response.defer()
+    await interaction.followup.send(await reset_timer_entry(name, interaction.user.name))
+
+@bot.tree.command(name="dt", description="Delete a custom command or timer")
+@app_commands.describe(name="Custom command or timer key")
+@app_commands.autocomplete(name=deletable_autocomplete)
+async def slash_delete_timer(interaction: discord.Interaction, name: str):
+    await interaction.response.defer()
+    await interaction.followup.send(await delete_timer_entry(name, interaction.user.name))
+
+@bot.tree.command(name="et", description="Change a timer command's duration")
+@app_commands.describe(name="Standard or custom command", duration="e.g. 2h30m, 1d")
+@app_commands.autocomplete(name=command_autocomplete)
+async def slash_edit_timer(interaction: discord.Interaction, name: str, duration: str):
+    await interaction.response.defer()
+    await interaction.followup.send(await edit_timer_entry(name, duration, interaction.user.name))
+
+@bot.tree.command(name="shift", description="Shift running demo timers by N hours")
+@app_commands.describe(hours="Hours to shift (negative = earlier)", location="Only this demo (default: all)")
+@app_commands.autocomplete(location=demo_autocomplete)
+async def slash_shift_demos(interaction: discord.Interaction, hours: int, location: str = None):
+    if hours == 0: return await interaction.response.send_message("❌ Hours cannot be 0.", ephemeral=True)
+    await interaction.response.defer()
+    await interaction.followup.send(await shift_demo_timers(hours, interaction.user.name, location))
+
 @bot.tree.command(name="lend", description="Borrow gold from bank")
 async def lend(interaction: discord.Interaction, amount: int):
     if amount <= 0: return await interaction.response.send_message("❌ Amount must be positive.", ephemeral=True)
     await interaction.response.defer()
     
-    # 1. Fetch current bank balance
     client = get_gspread_client()
     if not client: return await interaction.followup.send("❌ DB Error")
-    current_gbank = get_gbank_balance(client)
-    
-    # 2. Check Constraints
-    cap = int(current_gbank * LOAN_CAP_PERCENT)
     user_id_str = str(interaction.user.id)
-    state = load_state()
-    current_debt = state.get("debts", {}).get(user_id_str, 0)
-    
-    if (current_debt + amount) > cap:
-        return await interaction.followup.send(
-            f"❌ **Loan Denied**\n"
-            f"Bank Balance: {current_gbank}g\n"
-            f"Max Loan Cap (50%): {cap}g\n"
-            f"Your Current Debt: {current_debt}g\n"
-            f"Requested: {amount}g\n"
-            f"Available to you: {max(0, cap - current_debt)}g"
-        )
-    
-    # 3. Process Loan
     try:
-        # Update Debt
-        if "debts" not in state: state["debts"] = {}
-        state["debts"][user_id_str] = current_debt + amount
+        # Balance check, sheet append and debt update commit together; concurrent loans queue on the lock
+        async with state_txn("debts") as txn:
+            # 1. Current bank balance (served from the locally maintained value)
+            current_gbank, stale = await run_blocking(get_local_gbank)
+            if current_gbank is None: return await interaction.followup.send("❌ Bank balance unavailable, try again shortly.")
+            stale_note = gbank_stale_note() if stale else ""
+            
+            # 2. Check Constraints
+            cap = int(current_gbank * LOAN_CAP_PERCENT)
+            debts = txn["debts"] or {}
+            current_debt = debts.get(user_id_str, 0)
+            
+            if (current_debt + amount) > cap:
+                return await interaction.followup.send(
+                    f"❌ **Loan Denied**\n"
+                    f"Bank Balance: {current_gbank}g\n"
+                    f"Max Loan Cap (50%): {cap}g\n"
+                    f"Your Current Debt: {current_debt}g\n"
+                    f"Requested: {amount}g\n"
+                    f"Available to you: {max(0, cap - current_debt)}g"
+                    f"{stale_note}"
+                )
+            
+            # 3. Log to Sheet (Withdraw), then record the debt
+            ts = get_gb_time().strftime("%Y-%m-%d %H:%M:%S")
+            player = get_mapped_name(interaction.user)
+            await run_blocking(append_row_manual, client, TAB_DISCORD, [ts, player, "Withdraw", -amount, "Loan"])
+            adjust_local_gbank(-amount)
+            debts[user_id_str] = current_debt + amount
+            txn["debts"] = debts
         
         # Set Loan Timer (20 days) - HIDDEN from board
-        loan_timer_id = f"loan_{user_id_str}"
-        end_time = int(time.time()) + (LOAN_MAX_DAYS * 86400)
-        state['timers'][loan_timer_id] = {
-            "end_time": end_time, 
+        state = load_state()
+        state['timers'][f"loan_{user_id_str}"] = {
+            "end_time": int(time.time()) + (LOAN_MAX_DAYS * 86400), 
             "channel_id": PINNED_CHANNEL_ID, 
             "status": "running", 
             "display": f"Loan Due ({interaction.user.display_name})", 
             "hidden": True
         }
-        save_state(state)
-        
-        # Log to Sheet (Withdraw)
-        ts = get_gb_time().strftime("%Y-%m-%d %H:%M:%S")
-        player = get_mapped_name(interaction.user)
-        # UPDATED: Use manual append
-        append_row_manual(client, TAB_DISCORD, [ts, player, "Withdraw", -amount, "Loan"])
+        save_state(state, "timers")
         
         # Reply
-        await interaction.followup.send(f"✅ **Loan Approved**: {amount}g sent to {player}. Due in 20 days.")
+        await interaction.followup.send(f"✅ **Loan Approved**: {amount}g sent to {player}. Due in 20 days.{stale_note}")
         await update_dashboards()
-        await log_to_channel("Loan", f"{player} borrowed {amount}g. Total Debt: {state['debts'][user_id_str]}g", discord.Color.gold())
+        await log_to_channel("Loan", f"{player} borrowed {amount}g. Total Debt: {debts[user_id_str]}g", discord.Color.gold())
         
     except Exception as e:
         await interaction.followup.send(f"❌ Error processing loan: {e}")
@@ -690,32 +2097,31 @@ async def return_loan(interaction: discord.Interaction, amount: int):
     if amount <= 0: return await interaction.response.send_message("❌ Amount must be positive.", ephemeral=True)
     await interaction.response.defer()
     
-    state = load_state()
     user_id_str = str(interaction.user.id)
-    current_debt = state.get("debts", {}).get(user_id_str, 0)
-    
-    if current_debt == 0:
-        return await interaction.followup.send("✅ You have no active debts!")
-        
     try:
-        # 1. Update Debt
-        new_debt = max(0, current_debt - amount)
-        state["debts"][user_id_str] = new_debt
+        # Sheet append and debt update commit together; a failed append leaves the debt untouched
+        async with state_txn("debts") as txn:
+            debts = txn["debts"] or {}
+            current_debt = debts.get(user_id_str, 0)
+            if current_debt == 0:
+                return await interaction.followup.send("✅ You have no active debts!")
+            
+            # 1. Log to Sheet (Deposit)
+            client = get_gspread_client()
+            ts = get_gb_time().strftime("%Y-%m-%d %H:%M:%S")
+            player = get_mapped_name(interaction.user)
+            await run_blocking(append_row_manual, client, TAB_DISCORD, [ts, player, "Deposit", amount, "Loan Return"])
+            adjust_local_gbank(amount)
+            
+            # 2. Update Debt
+            new_debt = max(0, current_debt - amount)
+            debts[user_id_str] = new_debt
+            txn["debts"] = debts
         
-        # 2. Check if paid off
+        # 3. Check if paid off
         if new_debt == 0:
-            loan_timer_id = f"loan_{user_id_str}"
-            if loan_timer_id in state['timers']:
-                del state['timers'][loan_timer_id]
-        
-        save_state(state)
-        
-        # 3. Log to Sheet (Deposit)
-        client = get_gspread_client()
-        ts = get_gb_time().strftime("%Y-%m-%d %H:%M:%S")
-        player = get_mapped_name(interaction.user)
-        # UPDATED: Use manual append
-        append_row_manual(client, TAB_DISCORD, [ts, player, "Deposit", amount, "Loan Return"])
+            state = load_state()
+            if state['timers'].pop(f"loan_{user_id_str}", None): save_state(state, "timers")
         
         msg = f"✅ **Returned**: {amount}g."
         if new_debt > 0: msg += f" Remaining Debt: {new_debt}g."
@@ -742,7 +2148,7 @@ async def vacation(interaction: discord.Interaction):
         status = "ON"
         msg = "Enjoy your break! You will no longer be tagged."
     state["vacation"] = vacationers
-    save_state(state)
+    save_state(state, "vacation")
     await interaction.response.send_message(f"🌴 Vacation Mode: **{status}**. {msg}", ephemeral=True)
     await log_to_channel("Vacation Toggle", f"{interaction.user.name} toggled vacation to {status}", discord.Color.teal())
 
@@ -759,18 +2165,21 @@ async def slash_help(interaction: discord.Interaction):
     embed.add_field(name="🌱 Instanced", value="`!seedbed [time]`, `!kq [time]`", inline=False)
     if customs:
         embed.add_field(name="⚡ Custom", value=", ".join([f"`!{k}` ({v})" for k, v in customs.items()]), inline=False)
-    embed.add_field(name="🛠 Admin", value="`!ct`, `!et`, `!dt`, `!rt`, `!setrow`, `!tt`, `/createdemo`, `/prune`, `!lt`, `!update`", inline=False)
-    embed.add_field(name="💰 Bank", value="`/bank`, `/deposit`, `/withdraw`, `/lend`, `/return`", inline=False)
-    embed.add_field(name="🔔 Bump", value="`/bump [link] [timer]`, `/bumpoff`", inline=False)
+    embed.add_field(name="🛠 Admin", value="`!ct`, `!et`, `!dt`, `!rt` (also `/et`, `/dt`, `/rt`, `/shift`), `!setrow`, `!tt`, `/createdemo`, `/prune`, `!lt`, `!update`, `!remind`, `!reminders`, `!unremind`, `!profile`, `!caches`, `!mem`", inline=False)
+    embed.add_field(name="💰 Bank", value="`/bank [charts]`, `/trend [range]`, `/deposit`, `/withdraw`, `/lend`, `/return`", inline=False)
+    embed.add_field(name="🔔 Bump", value="`/bump [link] [timer]`, `/bumpoff [id]`", inline=False)
     embed.add_field(name="🌴 Misc", value="`/v` (Toggle Vacation)", inline=False)
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="bank", description="Show detailed financial stats")
-async def bank(interaction: discord.Interaction):
+@app_commands.describe(charts="Attach charts (daily in/out, categories, players)")
+async def bank(interaction: discord.Interaction, charts: bool = False):
     await interaction.response.defer()
-    stats = get_financial_detailed()
+    stats = await get_financials()
     if not stats: return await interaction.followup.send("❌ Error fetching data.")
     embed = discord.Embed(title="🏦 JEFBank Financials", color=discord.Color.gold())
+    embed.description = f"🕒 Updated <t:{int(financial_cache_time())}:R>" if financial_cache_time() else "🕒 Not yet synced"
+    if stats.get("stale"): embed.description += "\n⚠️ Sheets unavailable, showing last good data."
     embed.add_field(name="💰 Gbank Value", value=f"**{stats['gbank_val']}**", inline=False)
     today_str = (f"📥 In: {stats['today']['in']}g\n📤 Out: {stats['today']['out']}g\n📈 Net: {stats['today']['net']}g")
     embed.add_field(name="📅 Today's Activity", value=today_str, inline=True)
@@ -781,11 +2190,37 @@ async def bank(interaction: discord.Interaction):
         desc_str = f" - *{e['desc']}*" if e.get('desc') else ""
         hist_str += f"`{e['ts'].strftime('%d/%m %H:%M')}` **{e['player']}**: {e['type']} ({e['gold']}g){desc_str}\n"
     embed.add_field(name="📜 Last 5 Transactions", value=hist_str or "None", inline=False)
-    await interaction.followup.send(embed=embed)
+    if not charts: return await interaction.followup.send(embed=embed)
+    pngs = await render_bank_charts()
+    if not pngs:
+        embed.set_footer(text="Charts unavailable" + ("" if CHARTS_AVAILABLE else " (matplotlib or charts.py missing)"))
+        return await interaction.followup.send(embed=embed)
+    embeds = [embed] + [discord.Embed(color=discord.Color.gold()) for _ in pngs[1:]]
+    for e, (name, _) in zip(embeds, pngs): e.set_image(url=f"attachment://{name}")
+    await interaction.followup.send(embeds=embeds, files=[discord.File(io.BytesIO(png), filename=name) for name, png in pngs])
+
+TREND_RANGES = {"1h": 3600, "6h": 6 * 3600, "24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400, "1y": 365 * 86400}
+
+@bot.tree.command(name="trend", description="Bank balance trend")
+@app_commands.rename(window="range")
+@app_commands.describe(window="Time window (default 24h)")
+@app_commands.choices(window=[app_commands.Choice(name=k, value=k) for k in TREND_RANGES])
+async def trend(interaction: discord.Interaction, window: app_commands.Choice[str] = None):
+    key = window.value if window else "24h"
+    t = trend_summary(TREND_RANGES[key])
+    if not t: return await interaction.response.send_message("📉 No balance samples recorded yet.", ephemeral=True)
+    arrow = "📈" if t["delta"] > 0 else "📉" if t["delta"] < 0 else "➖"
+    pct = f" ({t['pct']:+.1f}%)" if t["pct"] is not None else ""
+    embed = discord.Embed(title=f"{arrow} Gbank Trend ({key})", color=discord.Color.gold())
+    embed.description = f"`{t['spark']}`\nSince <t:{int(t['since'])}:f> · {t['samples']} samples"
+    embed.add_field(name="Now", value=f"{t['last']:,}g", inline=True)
+    embed.add_field(name="Change", value=f"{t['delta']:+,}g{pct}", inline=True)
+    embed.add_field(name="Low / High", value=f"{t['min']:,}g / {t['max']:,}g", inline=True)
+    await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="createdemo", description="Schedule a demo")
-@app_commands.describe(location="Location Name", datetime_str="Format: 25.11.2025 00:30 (GB Time)")
-async def createdemo(interaction: discord.Interaction, location: str, datetime_str: str):
+@app_commands.describe(location="Location Name", datetime_str="Format: 25.11.2025 00:30 (GB Time)", reuse_thread="Post in this location's existing forum thread instead of a new one")
+async def createdemo(interaction: discord.Interaction, location: str, datetime_str: str, reuse_thread: bool = False):
     await interaction.response.defer()
     try:
         dt = GB_TZ.localize(datetime.strptime(datetime_str, "%d.%m.%Y %H:%M"))
@@ -794,10 +2229,18 @@ async def createdemo(interaction: discord.Interaction, location: str, datetime_s
     t_24h, t_4h, t_30m, t_15m, t_5m = dt-timedelta(hours=24), dt-timedelta(hours=4), dt-timedelta(minutes=30), dt-timedelta(minutes=15), dt-timedelta(minutes=5)
     now = get_gb_time()
     forum = bot.get_channel(DEMO_FORUM_ID)
-    thread_id = None
-    if forum and isinstance(forum, discord.ForumChannel):
-        thread, _ = await forum.create_thread(name=f"{location} - {dt.strftime('%d/%m')}", content=(f"**Demo Scheduled**\n📍 **Location:** {location}\n📅 **Time:** <t:{int(dt.timestamp())}:F>\n{get_ping_string()}"))
+    thread_id = find_demo_thread(location) if reuse_thread else None
+    content = f"**Demo Scheduled**\n📍 **Location:** {location}\n📅 **Time:** <t:{int(dt.timestamp())}:F>\n{get_ping_string()}"
+    if thread_id:
+        try:
+            thread = bot.get_channel(thread_id) or await bot.fetch_channel(thread_id)
+            await thread.send(content)
+        except discord.NotFound:
+            unindex_forum_thread(thread_id); thread_id = None
+    if not thread_id and forum and isinstance(forum, discord.ForumChannel):
+        thread, _ = await forum.create_thread(name=f"{location} - {dt.strftime('%d/%m')}", content=content)
         thread_id = thread.id
+        index_forum_thread(thread)
     state = load_state()
     if dt > now:
         state['timers'][f"demo_{location}_main"] = {
@@ -808,7 +2251,7 @@ async def createdemo(interaction: discord.Interaction, location: str, datetime_s
             state['timers'][f"demo_{location}_{lbl}"] = {
                 "end_time": int(obj.timestamp()), "channel_id": PINNED_CHANNEL_ID, "status": "running", "display": f"Demo Alert {location} {lbl}", "hidden": True, "thread_id": thread_id
             }
-    save_state(state)
+    save_state(state, "timers")
     await update_dashboards()
     await interaction.followup.send(f"✅ Demo set for {location} at <t:{int(dt.timestamp())}:f>.")
     await log_to_channel("Demo Created", f"Demo at {location} for {datetime_str} created by {interaction.user.name}", discord.Color.purple())
@@ -839,41 +2282,37 @@ async def bump(interaction: discord.Interaction, link: str, timer: str):
     if not link.startswith("https://discord.com/channels/"):
         return await interaction.followup.send("❌ Invalid Discord link. Must start with `https://discord.com/channels/`")
     
-    # Save bump configuration
-    state = load_state()
-    state["bump"] = {
-        "link": link,
-        "interval": interval_seconds,
-        "last_run": int(time.time()),  # Start counting from now
-        "timer_str": timer
-    }
-    save_state(state)
+    # Save bump as a recurring job (any number can run side by side)
+    job = make_job("interval", interval_seconds, "bump", interaction.user.name, link=link, label=timer)
+    job_id = _next_job_id(load_state()["jobs"], "bump")
+    add_job(job_id, job)
     
     await interaction.followup.send(
-        f"✅ **Bump Reminders Configured**\n"
+        f"✅ **Bump Reminders Configured** (`{job_id}`)\n"
         f"📍 Link: {link}\n"
         f"⏰ Interval: {timer}\n"
         f"👥 Will ping: {get_ping_string()}\n"
-        f"Next bump: <t:{int(time.time() + interval_seconds)}:R>"
+        f"Next bump: <t:{job['next_run']}:R>"
     )
     await log_to_channel(
         "Bump Configured", 
-        f"Bump reminders set by {interaction.user.name}\nLink: {link}\nInterval: {timer}", 
+        f"Bump `{job_id}` set by {interaction.user.name}\nLink: {link}\nInterval: {timer}", 
         discord.Color.blue()
     )
 
 @bot.tree.command(name="bumpoff", description="Turn off bump reminders")
-async def bumpoff(interaction: discord.Interaction):
+@app_commands.describe(bump_id="Bump to stop (e.g. bump1); omit to stop all")
+async def bumpoff(interaction: discord.Interaction, bump_id: str = None):
     state = load_state()
+    bumps = [k for k, v in state.get("jobs", {}).items() if v["action"] == "bump" and (not bump_id or k == bump_id)]
     
-    if not state.get("bump"):
-        return await interaction.response.send_message("❌ No bump reminders are currently configured.", ephemeral=True)
+    if not bumps:
+        return await interaction.response.send_message("❌ No matching bump reminders are configured.", ephemeral=True)
     
-    state["bump"] = {}
-    save_state(state)
+    for job_id in bumps: remove_job(job_id)
     
-    await interaction.response.send_message("✅ Bump reminders disabled.", ephemeral=True)
-    await log_to_channel("Bump Disabled", f"Bump reminders disabled by {interaction.user.name}", discord.Color.orange())
+    await interaction.response.send_message(f"✅ Bump reminders disabled: {', '.join(bumps)}", ephemeral=True)
+    await log_to_channel("Bump Disabled", f"Bump reminders {', '.join(bumps)} disabled by {interaction.user.name}", discord.Color.orange())
 
 @bot.tree.command(name="deposit", description="Log deposit")
 @app_commands.choices(type=[app_commands.Choice(name=k, value=k) for k in ["Larders", "Dungeon", "Crafting", "Donation", "Traderun", "Loyalty", "Other"]])
@@ -893,7 +2332,8 @@ async def handle_transaction(interaction, type_str, gold_amt, desc_str):
         ts = get_gb_time().strftime("%Y-%m-%d %H:%M:%S")
         player = get_mapped_name(interaction.user)
         # UPDATED: Use manual append
-        append_row_manual(client, TAB_DISCORD, [ts, player, type_str, gold_amt, desc_str])
+        await run_blocking(append_row_manual, client, TAB_DISCORD, [ts, player, type_str, gold_amt, desc_str])
+        adjust_local_gbank(gold_amt)
         
         color = discord.Color.green() if gold_amt > 0 else discord.Color.red()
         embed = discord.Embed(title=f"💰 {type_str}", color=color)
@@ -908,64 +2348,6 @@ async def handle_transaction(interaction, type_str, gold_amt, desc_str):
         await interaction.followup.send(f"Error: {e}")
 
 # --- TASKS ---
-@tasks.loop(minutes=1)
-async def scheduler_task():
-    now = get_gb_time()
-    today_str = now.strftime("%Y-%m-%d")
-    state = load_state()
-    is_time = (now.hour == 4 and now.minute == 30)
-    is_late = (now.hour >= 4 and (now.hour > 4 or now.minute > 30)) and (state.get("last_motd_date") != today_str)
-    if is_time or is_late:
-        weekday = now.weekday()
-        msg = None
-        if weekday == 4: msg = "Pick DS quest AT today"
-        elif weekday == 5: msg = "Fish AT today\nDGS AT today\nLib AT today"
-        elif weekday == 6: msg = "Anth AT today"
-        if msg: state["motd"] = msg
-        else: state["motd"] = ""
-        state["last_motd_date"] = today_str
-        save_state(state)
-        if is_time and msg:
-            chan = bot.get_channel(PINNED_CHANNEL_ID)
-            if chan: await chan.send(f"📢 **DAILY REMINDER**\n{msg}")
-        await update_dashboards()
-
-@tasks.loop(seconds=30)
-async def bump_monitor():
-    """Check if it's time to send bump reminders"""
-    state = load_state()
-    bump_config = state.get("bump", {})
-    
-    if not bump_config:
-        return  # No bump configured
-    
-    now = int(time.time())
-    last_run = bump_config.get("last_run", 0)
-    interval = bump_config.get("interval", 0)
-    link = bump_config.get("link", "")
-    
-    if interval == 0 or not link:
-        return  # Invalid configuration
-    
-    # Check if it's time to bump
-    if now >= (last_run + interval):
-        channel = bot.get_channel(PINNED_CHANNEL_ID)
-        if channel:
-            try:
-                ping = get_ping_string()
-                await channel.send(
-                    f"🔔 **BUMPY TIME!**\n"
-                    f"{ping} - Time to bump!\n"
-                    f"Thread: {link}"
-                )
-                
-                # Update last_run time
-                state["bump"]["last_run"] = now
-                save_state(state)
-                
-            except Exception as e:
-                logger.error(f"Bump reminder error: {e}")
-
 @bot.tree.command(name="refresh", description="Force update")
 async def refresh(interaction: discord.Interaction):
     await interaction.response.defer()
@@ -973,6 +2355,18 @@ async def refresh(interaction: discord.Interaction):
     await update_dashboards(force_financial=True)
     await interaction.followup.send("Updated.")
 
+def _since_ms(created_at): return round((discord.utils.utcnow() - created_at).total_seconds() * 1000)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    logger.info(f"/{command.qualified_name} by {interaction.user.name}",
+                extra={"command": command.qualified_name, "user": interaction.user.name, "latency": _since_ms(interaction.created_at)})
+
+@bot.event
+async def on_command_completion(ctx):
+    logger.info(f"!{ctx.command.qualified_name} by {ctx.author.name}",
+                extra={"command": ctx.command.qualified_name, "user": ctx.author.name, "latency": _since_ms(ctx.message.created_at)})
+
 @bot.event
 async def on_ready():
     logger.info(f'Logged in as {bot.user}')
@@ -985,12 +2379,21 @@ async def on_ready():
     if not background_sheet_check.is_running(): background_sheet_check.start()
     if not timer_monitor.is_running(): timer_monitor.start()
     if not update_pinned_message.is_running(): update_pinned_message.start()
-    if not scheduler_task.is_running(): scheduler_task.start()
     if not hourly_state_backup.is_running(): hourly_state_backup.start()
     if not channel_wiper.is_running(): channel_wiper.start()
     if not github_monitor.is_running(): github_monitor.start()
-    if not bump_monitor.is_running(): bump_monitor.start()
     if not state_flusher.is_running(): state_flusher.start()
+    if not bank_reconciler.is_running(): bank_reconciler.start()
+    if not ledger_reconciler.is_running(): ledger_reconciler.start()
+    if not financial_refresher.is_running(): financial_refresher.start()
+    if not audit_flusher.is_running(): audit_flusher.start()
+    start_scheduler()
+    if getattr(bot, "warm_start", False):
+        bot.warm_start = False
+        apply_warm_board_pages(bot.get_channel(PINNED_CHANNEL_ID))
+        asyncio.create_task(refresh_financials())  # Revalidate the restored snapshot in the background
+    await load_forum_index()
+    logger.info(f"RSS after ready: {rss_bytes() / 1048576:.1f} MiB (low memory: {LOW_MEMORY})")
     chan = bot.get_channel(PINNED_CHANNEL_ID)
     if chan: await chan.send(f"🤖 **JEFFBANK IS AWAKE** ({BOT_VERSION})")
 
@@ -1027,7 +2430,7 @@ async def github_monitor():
                 logger.info("Update detected from GitHub. Overwriting and restarting...")
                 await log_to_channel("System Update", "New code detected on GitHub. Overwriting and restarting...", discord.Color.purple())
                 with open(__file__, 'w', encoding='utf-8') as f: f.write(new_code)
-                os.execv(sys.executable, ['python'] + sys.argv)
+                await restart_process()
     except Exception as e: logger.error(f"GitHub Monitor Error: {e}")
 
 @tasks.loop(seconds=1)
@@ -1076,19 +2479,46 @@ async def timer_monitor():
                 del timers[name]
                 dirty = True
     if dirty:
-        save_state(state)  # In-memory only, flushed to disk by state_flusher
+        save_state(state, "timers")  # In-memory only, flushed to disk by state_flusher
         # Offload dashboard update to background so it never delays the next timer tick
         asyncio.create_task(update_dashboards(skip_financials=True))
 
+@tasks.loop(seconds=_BANK_RECONCILE_INTERVAL)
+async def bank_reconciler():
+    # Skip if a financial refresh already synced B2 recently
+    if (time.time() - _bank_balance_time) < _BANK_RECONCILE_INTERVAL / 2: return
+    await run_blocking(reconcile_gbank)
+
+@tasks.loop(hours=1)
+async def ledger_reconciler():
+    """Low-frequency sweep for manual edits to historical ledger rows."""
+    if ledger_reconciler.current_loop == 0: return  # Startup refresh has just read everything
+    stats, _ = _fin_cache.peek("stats")
+    if not await run_blocking(reconcile_ledger) or not stats: return
+    replace_financial_stats(await run_blocking(build_financial_stats, stats["gbank_val"]))
+    await update_dashboards(skip_financials=True)
+
+@tasks.loop(seconds=30)
+async def financial_refresher():
+    """Keep the financial snapshot warm so no reader ever pays for the download inline."""
+    _, age = get_financial_snapshot()
+    if age is None or age >= _FINANCIAL_TTL - _FINANCIAL_REFRESH_MARGIN:
+        await refresh_financials()
+        if age == float("inf"): await update_dashboards(skip_financials=True)  # Invalidated by a write: show it now
+
 @tasks.loop(minutes=10)
-async def update_pinned_message(): await update_dashboards(force_financial=True)
+async def update_pinned_message(): await update_dashboards()
+@tasks.loop(seconds=_AUDIT_FLUSH_SECONDS)
+async def audit_flusher(): await flush_audit()
+
 @tasks.loop(seconds=30)
 async def state_flusher():
-    """Periodically flush in-memory state to disk."""
-    _flush_state()
+    """Periodically flush in-memory state (and the balance history) to disk."""
+    await flush_state()
+    await flush_balance_history()
 @tasks.loop(hours=1)
 async def hourly_state_backup():
-    _flush_state()  # Ensure state is saved before backup
+    await flush_state()  # Ensure state is saved before backup
     state = load_state(); state_str = json.dumps(state, indent=2)
     if len(state_str) > 1900: state_str = state_str[:1900] + "\n...[TRUNCATED]"
     await log_to_channel("Hourly State Backup", f"```json\n{state_str}\n```", discord.Color.dark_grey())
@@ -1097,93 +2527,306 @@ async def run_sheet_check(manual):
     client = get_gspread_client()
     if not client: return
     try:
-        sheet = client.open(SHEET_NAME).worksheet(TAB_FORM); all_rows = sheet.get_all_values()
-        current = len(all_rows); state = load_state(); last = max(state.get("last_form_row", 1), 1); count = 0
-        if current > last:
-            chan = bot.get_channel(PINNED_CHANNEL_ID)
-            for i in range(last, current):
-                r = all_rows[i]; 
-                if not any(r): continue
-                while len(r) < 5: r.append("")
-                embed = discord.Embed(title="💸 Form Update", color=discord.Color.blue())
-                embed.add_field(name="Player", value=r[1]); embed.add_field(name="Gold", value=r[3])
-                embed.add_field(name="Type", value=r[2]); embed.set_footer(text=r[0])
-                if chan: await chan.send(embed=embed)
-                count += 1
-            state["last_form_row"] = current; save_state(state)
+        async with state_txn("last_form_row") as txn:  # A manual and a background check must not both post the same rows
+            all_rows = await run_blocking(with_worksheet, TAB_FORM, lambda ws: ws.get_all_values(), client)
+            current = len(all_rows); last = max(txn["last_form_row"] or 1, 1); count = 0
+            if current > last:
+                chan = bot.get_channel(PINNED_CHANNEL_ID)
+                for i in range(last, current):
+                    r = all_rows[i]; 
+                    if not any(r): continue
+                    if chan: await chan.send(embed=form_update_embed(r))
+                    count += 1
+                txn["last_form_row"] = current
         if not manual: await log_to_channel("Sheet Check", f"Checked Form. Current Row: {current}. New Entries: {count}", discord.Color.light_gray())
-    except Exception as e: await log_to_channel("Sheet Check Error", str(e), discord.Color.red())
-
-# --- CACHED PINNED MESSAGES ---
-_pinned_fin_msg = None
-_pinned_tim_msg = None
+    except Exception as e: await log_to_channel("Sheet Check Error", str(e), discord.Color.red(), urgent=True)
+
+def form_update_embed(r):
+    r = list(r) + [""] * (5 - len(r))
+    embed = discord.Embed(title="💸 Form Update", color=discord.Color.blue())
+    embed.add_field(name="Player", value=r[1]); embed.add_field(name="Gold", value=r[3])
+    embed.add_field(name="Type", value=r[2]); embed.set_footer(text=r[0])
+    return embed
+
+# --- FORM WEBHOOK ---
+# Optional push path for form deposits: a sheet-side onFormSubmit script POSTs each new row here
+# and it is announced at once, with last_form_row, the FORM ledger cache and the local balance
+# updated without any sheet read. background_sheet_check stays on as a slower safety net.
+# Enable with FORM_WEBHOOK_PORT (+ FORM_WEBHOOK_SECRET, required); bind is 127.0.0.1 unless
+# FORM_WEBHOOK_HOST says otherwise, so expose it through a reverse proxy/tunnel.
+#   POST /form   X-Webhook-Secret: <secret>
+#   {"row": 57, "values": ["2025-11-20 18:01:02", "Player", "Dungeon", "500", "desc"]}  (or {"rows": [...]})
+#   Apps Script: UrlFetchApp.fetch(URL, {method: "post", contentType: "application/json",
+#     headers: {"X-Webhook-Secret": SECRET}, payload: JSON.stringify({row: e.range.getRow(), values: e.values})})
+FORM_WEBHOOK_PORT = int(os.getenv('FORM_WEBHOOK_PORT', '0'))  # 0 = disabled
+FORM_WEBHOOK_HOST = os.getenv('FORM_WEBHOOK_HOST', '127.0.0.1')
+FORM_WEBHOOK_SECRET = os.getenv('FORM_WEBHOOK_SECRET', '')
+_FORM_POLL_WITH_WEBHOOK_HOURS = 6
+_webhook_runner = None
+
+def parse_form_payload(payload):
+    """Returns [(sheet_row, values)] sorted by row. Raises ValueError on a malformed body."""
+    items = payload.get("rows", [payload]) if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items: raise ValueError("expected {row, values} or {rows: [...]}")
+    rows = []
+    for item in items:
+        if not isinstance(item, dict): raise ValueError(f"bad row entry: {str(item)[:100]}")
+        row, values = item.get("row"), item.get("values")
+        if not isinstance(row, int) or row < 2 or not isinstance(values, list) or len(values) < 4:
+            raise ValueError(f"bad row entry: {str(item)[:100]}")
+        rows.append((row, [str(v) for v in values[:5]]))
+    return sorted(rows)
+
+def ingest_ledger_rows(tab, first_row, rows):
+    """Splice rows that start at sheet row `first_row` into the local ledger. Rows past the end of the
+    cache (a gap) are left for the next tail sync. Returns True if anything was applied."""
+    with _ledger_lock: return _splice_ledger(tab, first_row - 2, rows) > 0  # Row 1 is the header
+
+async def ingest_form_rows(rows):
+    """Announce pushed form rows in order. Rows at or below last_form_row are duplicates; a gap
+    (a push that never arrived) stops ingestion and falls back to a sheet check to catch up."""
+    announced, duplicates, gap = [], 0, False
+    async with state_txn("last_form_row") as txn:
+        last = max(txn["last_form_row"] or 1, 1)
+        chan = bot.get_channel(PINNED_CHANNEL_ID)
+        for row, values in rows:
+            if row <= last: duplicates += 1; continue
+            if row != last + 1: gap = True; break
+            if any(values) and chan: await chan.send(embed=form_update_embed(values))
+            announced.append(values); last = row
+            txn["last_form_row"] = last
+    if announced:
+        await run_blocking(ingest_ledger_rows, TAB_FORM, last - len(announced) + 1, announced)
+        for values in announced:
+            try: adjust_local_gbank(parse_gold(values[3]))
+            except ValueError: pass
+        stats, _ = _fin_cache.peek("stats")
+        if stats: replace_financial_stats(await run_blocking(build_financial_stats, stats["gbank_val"]))
+        await update_dashboards(skip_financials=True)
+    if gap: asyncio.create_task(run_sheet_check(True))
+    logger.info(f"Form webhook: {len(announced)} announced, {duplicates} duplicate(s){', gap -> sheet check' if gap else ''}")
+    return {"announced": len(announced), "duplicates": duplicates, "gap": gap, "last_form_row": last}
+
+def build_form_webhook_app():
+    from aiohttp import web  # Ships with discord.py; only imported when the receiver is enabled
+    async def handle(request):
+        given = request.headers.get("X-Webhook-Secret", "").encode("utf-8", "surrogateescape")  # Bytes: str compare_digest rejects non-ASCII
+        if not hmac.compare_digest(given, FORM_WEBHOOK_SECRET.encode()):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        try: rows = parse_form_payload(await request.json())
+        except ValueError as e: return web.json_response({"error": str(e)}, status=400)
+        return web.json_response(await ingest_form_rows(rows))
+    app = web.Application(client_max_size=64 * 1024)
+    app.router.add_post("/form", handle)
+    return app
+
+async def start_form_webhook():
+    global _webhook_runner
+    if not FORM_WEBHOOK_PORT or _webhook_runner: return
+    if not FORM_WEBHOOK_SECRET: return logger.error("FORM_WEBHOOK_PORT set without FORM_WEBHOOK_SECRET; receiver not started")
+    from aiohttp import web
+    _webhook_runner = web.AppRunner(build_form_webhook_app(), access_log=None)
+    await _webhook_runner.setup()
+    await web.TCPSite(_webhook_runner, FORM_WEBHOOK_HOST, FORM_WEBHOOK_PORT).start()
+    background_sheet_check.change_interval(hours=_FORM_POLL_WITH_WEBHOOK_HOURS)
+    logger.info(f"Form webhook listening on {FORM_WEBHOOK_HOST}:{FORM_WEBHOOK_PORT}")
+
+async def stop_form_webhook():
+    global _webhook_runner
+    if _webhook_runner: await _webhook_runner.cleanup()
+    _webhook_runner = None
+
+# --- STATUS BOARD ---
+# The pinned boards are built from independently rendered sections, each with a version key.
+# Only sections whose key changed are re-rendered, only pages whose text changed are edited, and
+# a board that outgrows one message overflows into extra pinned pages ("HEADER (2)", ...).
+_BOARD_PAGE_CHARS = 1900  # Discord caps messages at 2000
+BOARD_HEADERS = {"fin": HEADER_FIN, "tim": HEADER_TIMER}
+_section_cache = Cache("board_sections", maxsize=32)  # (section, version) -> lines
+_board_pages = {"fin": None, "tim": None}  # board -> pinned page messages (None = not looked up yet)
+_board_page_text = {}                      # message id -> content last sent
+_board_lock = asyncio.Lock()
+_timer_order_cache = Cache("visible_timers", maxsize=1)  # state revision -> visible timers sorted by end time
+
+def _section(name, version, render):
+    return _section_cache.get_or_load((name, version), render)
+
+def _visible_timers(state):
+    """Visible timers sorted by end time; only re-sorted when state has been saved since."""
+    def sort():
+        items = [(k, v) for k, v in state.get("timers", {}).items() if not v.get('hidden')]
+        items.sort(key=lambda x: x[1].get('end_time', 0))
+        return items
+    return _timer_order_cache.get_or_load(_state_rev, sort)
+
+def render_bank_section(stats):
+    lines = [
+        f"Last Restart: <t:{START_TIME}:f>",
+        f"Current Gbank: **{stats['gbank_val']}**",
+        f"Top Contributions: **{stats['top_categories']}**",
+        f"Last Refresh: <t:{int(financial_cache_time() or time.time())}:f>",
+        "---",
+        f"**Today:** In {stats['today']['in']} | Out {stats['today']['out']} | Net {stats['today']['net']}",
+        f"**Week:** In {stats['week']['in']} | Out {stats['week']['out']} | Net {stats['week']['net']}",
+        f"**Month:** In {stats['month']['in']} | Out {stats['month']['out']} | Net {stats['month']['net']}",
+        "---"
+    ]
+    if stats.get("stale"): lines.insert(0, "⚠️ **Sheets unavailable, showing last good data**")
+    return lines
+
+def render_loans_section(active_debts):
+    if not active_debts: return []
+    return ["**Outstanding Loans:**"] + [f"• {PLAYER_MAP.get(int(uid), 'Unknown')}: {amount}g" for uid, amount in active_debts]
+
+def build_boards(state, stats):
+    """Returns {board: [lines]} assembled from cached sections."""
+    now_ts = int(time.time())
+    fin = [HEADER_FIN]
+    if stats:
+        fin += _section("bank", (stats.get("version"), stats.get("stale"), financial_cache_time()), lambda: render_bank_section(stats))
+        debts = tuple((k, v) for k, v in state.get("debts", {}).items() if v > 0)
+        fin += _section("loans", debts, lambda: render_loans_section(debts))
+    tim = [HEADER_TIMER]
+    motd = state.get("motd", "")
+    tim += _section("motd", motd, lambda: [f"\n📢 **TODAY:**\n{motd}\n"] if motd else [])
+    today, later, done = [], [], []
+    for name, data in _visible_timers(state):
+        if data['status'] == 'running': (later if (data['end_time'] - now_ts) > 86400 else today).append((name, data))
+        elif data['status'] == 'expired': done.append((name, data))
+    running_fmt = lambda n, d: f"• **{d.get('display', n.capitalize())}**: <t:{d['end_time']}:R>"
+    done_fmt = lambda n, d: f"• **{d.get('display', n.capitalize())}** (<t:{d['end_time']}:R>)"
+    for sec, title, items, fmt in [("today", "**Timers (Today)**", today, running_fmt),
+                                   ("later", "\n**Timers (1d+)**", later, running_fmt),
+                                   ("done", "\n**Timers (DONE)**", done, done_fmt)]:
+        version = tuple((n, d['end_time'], d['status'], d.get('display')) for n, d in items)
+        tim += _section(sec, version, lambda: [title] + ([fmt(n, d) for n, d in items] or ["_None_"]))
+    return {"fin": fin, "tim": tim}
+
+def paginate_board(lines):
+    """Split a board into <=_BOARD_PAGE_CHARS pages on line boundaries; extra pages get a numbered header."""
+    header = lines[0]
+    pages, cur, size = [], [header], len(header)
+    for line in lines[1:]:
+        line = line[:_BOARD_PAGE_CHARS // 2]
+        if size + 1 + len(line) > _BOARD_PAGE_CHARS:
+            pages.append("\n".join(cur))
+            cont = f"{header} ({len(pages) + 1})"
+            cur, size = [cont], len(cont)
+        cur.append(line); size += 1 + len(line)
+    pages.append("\n".join(cur))
+    return pages
+
+def _page_number(content, header):
+    m = re.fullmatch(re.escape(header) + r"(?: \((\d+)\))?", content.split("\n", 1)[0])
+    return int(m.group(1) or 1) if m else None
+
+async def _load_board_pages(channel):
+    pins = await channel.pins()
+    for board, header in BOARD_HEADERS.items():
+        found = [(_page_number(m.content, header), m) for m in pins if m.author == bot.user]
+        _board_pages[board] = [m for n, m in sorted((x for x in found if x[0]), key=lambda x: x[0])]
+        for m in _board_pages[board]: _board_page_text[m.id] = m.content
+
+async def _sync_board(channel, board, pages):
+    msgs = _board_pages[board]
+    for i, text in enumerate(pages):
+        if i >= len(msgs):
+            msg = await channel.send(text)
+            await msg.pin()
+            msgs.append(msg)
+        elif _board_page_text.get(msgs[i].id) != text:
+            await msgs[i].edit(content=text)
+        _board_page_text[msgs[i].id] = text
+    for msg in msgs[len(pages):]:  # Board shrank
+        await msg.delete()
+        _board_page_text.pop(msg.id, None)
+    del msgs[len(pages):]
 
 async def update_dashboards(skip_financials=False, force_financial=False):
     channel = bot.get_channel(PINNED_CHANNEL_ID)
     if not channel: return
     state = load_state()
-    stats = get_financial_detailed(force=force_financial) if not skip_financials else _financial_cache
-    timers = state.get("timers", {})
-    debts = state.get("debts", {}) # Get Debt Info
-    now_gb = get_gb_time()
-    now_ts = int(time.time())
-    
-    fin_lines = [HEADER_FIN]
-    if stats:
-        fin_lines.extend([
-            f"Last Restart: <t:{START_TIME}:f>",
-            f"Current Gbank: **{stats['gbank_val']}**",
-            f"Top Contributions: **{stats['top_categories']}**",
-            f"Last Refresh: <t:{int(now_gb.timestamp())}:f>",
-            "---",
-            f"**Today:** In {stats['today']['in']} | Out {stats['today']['out']} | Net {stats['today']['net']}",
-            f"**Week:** In {stats['week']['in']} | Out {stats['week']['out']} | Net {stats['week']['net']}",
-            f"**Month:** In {stats['month']['in']} | Out {stats['month']['out']} | Net {stats['month']['net']}",
-            "---"
-        ])
-        
-        # Add Debt Section if debts exist
-        active_debts = {k: v for k, v in debts.items() if v > 0}
-        if active_debts:
-            fin_lines.append("**Outstanding Loans:**")
-            for uid, amount in active_debts.items():
-                name = PLAYER_MAP.get(int(uid), "Unknown")
-                fin_lines.append(f"• {name}: {amount}g")
-    
-    timer_lines = [HEADER_TIMER]
-    if state.get("motd"): timer_lines.append(f"\n📢 **TODAY:**\n{state['motd']}\n")
-    list_today = []; list_later = []; list_done = []
-    for name, data in sorted(timers.items(), key=lambda x: x[1].get('end_time', 0)):
-        if data.get('hidden'): continue
-        d_name = data.get('display', name.capitalize())
-        if data['status'] == 'running':
-            t_str = f"• **{d_name}**: <t:{data['end_time']}:R>"
-            if (data['end_time'] - now_ts) > 86400: list_later.append(t_str)
-            else: list_today.append(t_str)
-        elif data['status'] == 'expired': list_done.append(f"• **{d_name}** (<t:{data['end_time']}:R>)")
-    timer_lines.append("**Timers (Today)**"); timer_lines.extend(list_today if list_today else ["_None_"])
-    timer_lines.append("\n**Timers (1d+)**"); timer_lines.extend(list_later if list_later else ["_None_"])
-    timer_lines.append("\n**Timers (DONE)**"); timer_lines.extend(list_done if list_done else ["_None_"])
+    if force_financial: stats = await refresh_financials()
+    elif skip_financials: stats = _fin_cache.peek("stats")[0]
+    else: stats = await get_financials()
+    boards = build_boards(state, stats)
+    async with _board_lock:
+        try:
+            # Only fetch pins if we don't have cached references
+            if any(v is None for v in _board_pages.values()): await _load_board_pages(channel)
+            for board, lines in boards.items():
+                await _sync_board(channel, board, paginate_board(lines))
+        except Exception as e:
+            # Reset cache on error so next call refetches
+            logger.error(f"Dashboard update error: {e}")
+            for board in _board_pages: _board_pages[board] = None
+            _board_page_text.clear()
+
+# --- WARM RESTART SNAPSHOT ---
+# On shutdown/self-update the warm caches (financial stats, parsed ledger, local balance, sheet key,
+# pinned board page IDs) are pickled next to the state file. A restart within _WARM_MAX_AGE loads
+# them instead of starting cold, then revalidates in the background.
+WARM_SNAPSHOT_FILE = 'bot_warm.pickle'
+_WARM_FORMAT = 1
+_WARM_MAX_AGE = 900
+_warm_board_ids = None  # {board: [(message id, text)]} until the pinned channel is available
+
+def _collect_warm_snapshot():
+    with _ledger_lock:
+        ledger = {tab: {k: list(v) for k, v in led.items()} for tab, led in _ledger.items()}
+    boards = {b: [(m.id, _board_page_text.get(m.id)) for m in msgs] for b, msgs in _board_pages.items() if msgs}
+    return {
+        "format": _WARM_FORMAT, "saved": time.time(), "ledger": ledger, "boards": boards,
+        "financial": _fin_cache.peek("stats"), "gbank": (_bank_balance, _bank_balance_time),
+        "sheet_key": _sheet_key,
+    }
+
+def _write_warm_snapshot(snap):
+    tmp = WARM_SNAPSHOT_FILE + ".tmp"
+    with open(tmp, 'wb') as f: pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, WARM_SNAPSHOT_FILE)
+
+async def save_warm_snapshot():
+    try: await run_blocking(lambda: _write_warm_snapshot(_collect_warm_snapshot()))
+    except Exception as e: logger.error(f"Warm snapshot save failed: {e}")
+
+def load_warm_snapshot():
+    """Restore warm caches if a recent snapshot exists. One-shot: the file is removed once read."""
+    global _bank_balance, _bank_balance_time, _sheet_key, _stats_seq, _warm_board_ids
+    if not os.path.exists(WARM_SNAPSHOT_FILE): return False
     try:
-        global _pinned_fin_msg, _pinned_tim_msg
-        # Only fetch pins if we don't have cached references
-        if not _pinned_fin_msg or not _pinned_tim_msg:
-            history = await channel.pins()
-            _pinned_fin_msg = next((m for m in history if m.author == bot.user and HEADER_FIN in m.content), None)
-            _pinned_tim_msg = next((m for m in history if m.author == bot.user and HEADER_TIMER in m.content), None)
-        if _pinned_fin_msg:
-            await _pinned_fin_msg.edit(content="\n".join(fin_lines))
-        else:
-            _pinned_fin_msg = await channel.send("\n".join(fin_lines))
-            await _pinned_fin_msg.pin()
-        if _pinned_tim_msg:
-            await _pinned_tim_msg.edit(content="\n".join(timer_lines))
-        else:
-            _pinned_tim_msg = await channel.send("\n".join(timer_lines))
-            await _pinned_tim_msg.pin()
-    except Exception:
-        # Reset cache on error so next call refetches
-        _pinned_fin_msg = None
-        _pinned_tim_msg = None
-
-bot.run(TOKEN)
+        with open(WARM_SNAPSHOT_FILE, 'rb') as f: snap = pickle.load(f)
+        os.remove(WARM_SNAPSHOT_FILE)
+    except Exception as e:
+        logger.error(f"Warm snapshot unreadable: {e}")
+        return False
+    age = time.time() - snap.get("saved", 0)
+    if snap.get("format") != _WARM_FORMAT or not 0 <= age <= _WARM_MAX_AGE: return False
+    with _ledger_lock:
+        for tab, led in snap["ledger"].items():
+            if tab in _ledger: _ledger[tab] = led
+        _bump_ledger_version()
+    stats, stats_at = snap["financial"]
+    if stats:
+        _fin_cache.set("stats", stats, stored_at=stats_at)
+        _stats_seq = itertools.count(stats["version"] + 1)  # Keep board section keys unique
+    _bank_balance, _bank_balance_time = snap["gbank"]
+    _sheet_key = _sheet_key or snap["sheet_key"]
+    _warm_board_ids = snap["boards"]
+    logger.info(f"Warm start from {age:.0f}s-old snapshot ({sum(len(l['rows']) for l in _ledger.values())} ledger rows)")
+    return True
+
+def apply_warm_board_pages(channel):
+    """Rebuild pinned page references from the snapshot so the first board update needs no pins fetch."""
+    global _warm_board_ids
+    if not _warm_board_ids or not channel: return
+    for board, pages in _warm_board_ids.items():
+        if board not in _board_pages: continue
+        _board_pages[board] = [channel.get_partial_message(mid) for mid, _ in pages]
+        _board_page_text.update({mid: text for mid, text in pages if text is not None})
+    if any(v is None for v in _board_pages.values()):  # Partial snapshot: let the next update look everything up
+        for board in _board_pages: _board_pages[board] = None
+    _warm_board_ids = None
+
+if __name__ == "__main__":
+    bot.run(TOKEN)
@@ -0,0 +1,48 @@
+"""Chart rendering for /bank charts. bot.py runs this file as a fresh worker process, so keep it
+free of side effects: no bot, env or logging setup at import time. Requires: pip install matplotlib
+
+Worker protocol: JSON {"window_days": n, "charts": {kind: series}} on stdin, a pickled
+{kind: PNG bytes} on stdout."""
+import io
+import json
+import pickle
+import sys
+
+def render_chart(kind, data, window_days):
+    """Rasterize one chart from plain-data series (window_days labels the category/player charts). Returns PNG bytes."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(8, 3.6), dpi=100)
+    titles = {"categories": f"Income by category ({window_days}d)", "players": f"Contributions by player ({window_days}d)"}
+    if kind == "daily":
+        labels, ins, outs = data
+        x = range(len(labels))
+        ax.bar([i - 0.2 for i in x], ins, width=0.4, color="#3ba55c", label="In")
+        ax.bar([i + 0.2 for i in x], [-v for v in outs], width=0.4, color="#ed4245", label="Out")
+        ax.set_xticks(list(x)); ax.set_xticklabels(labels, rotation=45, fontsize=8)
+        ax.set_title(f"Income vs outgoings (last {len(labels)} days)"); ax.legend()
+    elif not any(data[1]):
+        ax.text(0.5, 0.5, "No income logged in this period", ha="center", va="center", fontsize=12, color="#72767d")
+        ax.set_axis_off(); ax.set_title(titles[kind])
+    elif kind == "categories":
+        labels, values = data
+        ax.pie(values, labels=labels, autopct="%1.0f%%", textprops={"fontsize": 8})
+        ax.set_title(titles[kind])
+    else:
+        labels, values = data
+        ax.barh(labels[::-1], values[::-1], color="#faa61a")
+        ax.set_title(titles[kind])
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    return buf.getvalue()
+
+def main():
+    job = json.load(sys.stdin)
+    pngs = {kind: render_chart(kind, data, job["window_days"]) for kind, data in job["charts"].items()}
+    sys.stdout.buffer.write(pickle.dumps(pngs))
+
+if __name__ == "__main__":
+    main()
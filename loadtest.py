@@ -0,0 +1,455 @@
+"""
+Deterministic replay load test for bot.py.
+
+Replays a scripted (or previously recorded) stream of slash/prefix commands and clock advances
+against the real handlers in bot.py, with a fake Discord client and an in-memory gspread backend.
+Time inside the bot runs on a virtual clock, so a scenario spanning hours replays in seconds.
+
+Usage:
+    python loadtest.py                          # built-in "burst" scenario
+    python loadtest.py --script scenario.json   # replay a script / recording
+    python loadtest.py --sheets-latency-ms 150 --json
+
+Script format (JSON; events are replayed in "t" order, t = seconds after start):
+    {
+      "seed": 1, "start": "2026-10-16T18:00:00",
+      "setup": {"timers_due": 200, "ledger_rows": 3000, "demos": 5, "balance": 250000},
+      "events": [
+        {"t": 0,  "cmd": "deposit", "user": 109217807555649536, "args": {"type": "Dungeon", "gold": 500}},
+        {"t": 5,  "cmd": "migratedemos"},
+        {"t": 60, "form": ["2026-10-16 18:01:00", "Player", "Dungeon", "500", ""]},
+        {"t": 90, "advance": true}
+      ]
+    }
+A command event may add "repeat": n and "every": seconds to expand into n copies. A "form" event appends
+the row to the fake FORM tab and POSTs it to the bot's form webhook (stand-in for the sheet-side script).
+
+Report: end-to-end latency percentiles per command (real time), Discord and Sheets call counts,
+event-loop lag, and virtual time spent waiting on Sheets backoff / request budget.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time as real_time
+import typing
+from collections import Counter, defaultdict
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PINNED_CHANNEL_ID = 900000000000000001
+WORKDIR = tempfile.mkdtemp(prefix="jeffbot_loadtest_")
+
+# bot.py reads its config at import time
+os.environ.setdefault("DISCORD_TOKEN", "loadtest")
+os.environ.setdefault("SHEET_NAME", "loadtest")
+os.environ["PINNED_CHANNEL_ID"] = str(PINNED_CHANNEL_ID)
+os.environ["LOG_FILE"] = os.path.join(WORKDIR, "bot_debug.log")
+sys.path.insert(0, HERE)
+os.chdir(WORKDIR)  # bot_state.json and friends land in the scratch dir
+
+import discord  # noqa: E402
+from discord import app_commands  # noqa: E402
+from discord.ext import tasks  # noqa: E402
+import bot as jeffbot  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+DISCORD_CALLS = Counter()
+SHEETS_CALLS = Counter()
+
+# --- VIRTUAL CLOCK ---
+class VirtualClock:
+    """Stands in for the `time` module inside bot.py. sleep() (Sheets backoff, request budget)
+    advances virtual time instantly and is tallied separately from scripted advances."""
+    def __init__(self, start):
+        self.now = float(start)
+        self.waited = 0.0
+        self._lock = threading.Lock()
+    def time(self): return self.now
+    def monotonic(self): return self.now
+    def perf_counter(self): return real_time.perf_counter()
+    def sleep(self, seconds):
+        with self._lock:
+            self.now += max(0.0, seconds); self.waited += max(0.0, seconds)
+    def advance_to(self, ts):
+        with self._lock: self.now = max(self.now, float(ts))
+
+# --- FAKE GSPREAD ---
+def _col_row(label):
+    m = re.fullmatch(r"([A-Z]+)(\d+)?", label)
+    col = 0
+    for ch in m.group(1): col = col * 26 + (ord(ch) - 64)
+    return col, int(m.group(2)) if m.group(2) else None
+
+class FakeWorksheet:
+    def __init__(self, book, title, rows):
+        self.book = book; self.title = title; self.rows = rows
+    def _call(self, name):
+        SHEETS_CALLS[name] += 1
+        if self.book.latency: real_time.sleep(self.book.latency)
+    def _read(self, rng):
+        rng = rng.split("!")[-1]
+        start, _, end = rng.partition(":")
+        c1, r1 = _col_row(start)
+        c2, r2 = _col_row(end) if end else (c1, r1)
+        r1 = r1 or 1
+        r2 = r2 or len(self.rows)
+        out = [list(r[c1 - 1:c2]) for r in self.rows[r1 - 1:r2]]
+        for r in out:
+            while r and r[-1] == "": r.pop()
+        while out and not out[-1]: out.pop()
+        return out
+    def get_all_values(self):
+        self._call("get_all_values")
+        width = max((len(r) for r in self.rows), default=0)
+        return [list(r) + [""] * (width - len(r)) for r in self.rows]
+    def get(self, rng):
+        self._call("get")
+        return self._read(rng)
+    def acell(self, label):
+        self._call("acell")
+        if self.title == jeffbot.TAB_DASHBOARD and label == "B2":
+            return type("Cell", (), {"value": f"{self.book.balance():,}g"})()
+        vals = self._read(label)
+        return type("Cell", (), {"value": vals[0][0] if vals and vals[0] else None})()
+    def update(self, range_name=None, values=None):
+        self._call("update")
+        self.book.revision += 1
+        c, r = _col_row(range_name.split(":")[0])
+        while len(self.rows) < r: self.rows.append([])
+        self.rows[r - 1] = [str(v) for v in values[0]]
+
+class FakeSpreadsheet:
+    id = "loadtest-sheet"
+    title = "loadtest"
+    def __init__(self, tabs, base_balance, latency):
+        self.latency = latency
+        self.base_balance = base_balance
+        self.revision = 0
+        self.tabs = {t: FakeWorksheet(self, t, rows) for t, rows in tabs.items()}
+    def balance(self):
+        total = self.base_balance
+        for t in jeffbot.LEDGER_TABS:
+            for r in self.tabs[t].rows[1:]:
+                try: total += int(str(r[3]).replace(",", "").replace("g", ""))
+                except (IndexError, ValueError): pass
+        return total
+    def values_batch_get(self, ranges, params=None):
+        SHEETS_CALLS["values_batch_get"] += 1
+        if self.latency: real_time.sleep(self.latency)
+        out = []
+        for rng in ranges:
+            tab, _, cells = rng.rpartition("!")
+            ws = self.tabs[tab.strip("'")]
+            if ws.title == jeffbot.TAB_DASHBOARD and cells == "B2": values = [[f"{self.balance():,}g"]]
+            else: values = ws._read(cells)
+            out.append({"range": rng, "values": values} if values else {"range": rng})
+        return {"spreadsheetId": self.id, "valueRanges": out}
+    def get_lastUpdateTime(self):
+        SHEETS_CALLS["drive_metadata"] += 1
+        return f"rev-{self.revision}"
+    def worksheets(self):
+        SHEETS_CALLS["worksheets"] += 1
+        return list(self.tabs.values())
+    def worksheet(self, title):
+        SHEETS_CALLS["worksheet"] += 1
+        return self.tabs[title]
+
+class FakeGspreadClient:
+    def __init__(self, book): self.book = book
+    def open(self, name):
+        SHEETS_CALLS["open"] += 1
+        return self.book
+    def open_by_key(self, key):
+        SHEETS_CALLS["open_by_key"] += 1
+        return self.book
+
+# --- FAKE DISCORD ---
+class FakeUser:
+    def __init__(self, uid, name):
+        self.id = uid; self.name = name; self.display_name = name
+        self.guild_permissions = discord.Permissions.all()
+    def __str__(self): return self.name
+
+class FakeMessage:
+    _ids = iter(range(10 ** 6, 10 ** 9))
+    def __init__(self, channel, content=None, author=None):
+        self.id = next(FakeMessage._ids); self.channel = channel
+        self.content = content or ""; self.author = author; self.pinned = False
+    async def edit(self, content=None, **kw):
+        DISCORD_CALLS["message.edit"] += 1
+        if content is not None: self.content = content
+    async def pin(self):
+        DISCORD_CALLS["message.pin"] += 1
+        self.pinned = True; self.channel.pinned.append(self)
+    async def delete(self):
+        DISCORD_CALLS["message.delete"] += 1
+        if self in self.channel.pinned: self.channel.pinned.remove(self)
+
+class FakeChannel:
+    def __init__(self, cid, name):
+        self.id = cid; self.name = name; self.pinned = []; self.guild = None
+    async def send(self, content=None, **kw):
+        DISCORD_CALLS[f"{self.name}.send"] += 1
+        return FakeMessage(self, content, jeffbot.bot.user)
+    async def pins(self):
+        DISCORD_CALLS[f"{self.name}.pins"] += 1
+        return list(self.pinned)
+    async def purge(self, **kw):
+        DISCORD_CALLS[f"{self.name}.purge"] += 1
+        return []
+    def get_partial_message(self, mid):
+        return next((m for m in self.pinned if m.id == mid), FakeMessage(self, "", jeffbot.bot.user))
+
+class FakeResponse:
+    def __init__(self): self.done = False
+    def is_done(self): return self.done
+    async def defer(self, **kw):
+        DISCORD_CALLS["interaction.defer"] += 1; self.done = True
+    async def send_message(self, *a, **kw):
+        DISCORD_CALLS["interaction.send_message"] += 1; self.done = True
+
+class FakeFollowup:
+    async def send(self, *a, **kw):
+        DISCORD_CALLS["followup.send"] += 1
+    async def edit_message(self, *a, **kw):
+        DISCORD_CALLS["followup.edit_message"] += 1
+
+class FakeInteraction:
+    def __init__(self, user, channel):
+        self.user = user; self.channel = channel; self.message = None
+        self.response = FakeResponse(); self.followup = FakeFollowup()
+        self.created_at = discord.utils.utcnow()
+
+class FakeContext:
+    def __init__(self, user, channel):
+        self.author = user; self.channel = channel
+        self.message = type("Msg", (), {"created_at": discord.utils.utcnow()})()
+    async def send(self, *a, **kw):
+        DISCORD_CALLS["ctx.send"] += 1
+        return FakeMessage(self.channel, a[0] if a else kw.get("content"), jeffbot.bot.user)
+
+# --- SCENARIO ---
+DEFAULT_SCENARIO = {
+    "seed": 1, "start": "2026-10-16T18:00:00",
+    "setup": {"timers_due": 200, "ledger_rows": 3000, "demos": 5, "balance": 250000},
+    "events": [
+        {"t": 0, "cmd": "deposit", "args": {"type": "Dungeon", "gold": 500, "description": "burst"}, "repeat": 50, "every": 1.2},
+        {"t": 5, "cmd": "migratedemos"},
+        {"t": 10, "cmd": "lend", "args": {"amount": 1000}},
+        {"t": 12, "cmd": "lend", "args": {"amount": 1000}},
+        {"t": 20, "cmd": "bank", "repeat": 5, "every": 5},
+        {"t": 30, "cmd": "refresh"},
+        {"t": 31, "cmd": "refresh"},
+        {"t": 40, "cmd": "return", "args": {"amount": 500}},
+        {"t": 45, "cmd": "withdraw", "args": {"category": "General", "gold": 300, "description": "regear"}},
+        {"t": 50, "form": ["2026-10-16 18:00:50", "Player", "Donation", "750", "form push"], "repeat": 5, "every": 2},
+        {"t": 60, "advance": True},
+        {"t": 900, "advance": True},
+    ],
+}
+
+def build_world(scenario, latency):
+    setup = scenario.get("setup", {})
+    rng = random.Random(scenario.get("seed", 1))
+    start = datetime.fromisoformat(scenario.get("start", "2026-10-16T18:00:00"))
+    start_ts = jeffbot.GB_TZ.localize(start).timestamp() if start.tzinfo is None else start.timestamp()
+    header = ["Timestamp", "Player", "Type", "Gold", "Description"]
+    types = ["Larders", "Dungeon", "Crafting", "Donation", "Traderun", "Withdraw"]
+    tabs = {t: [list(header)] for t in jeffbot.LEDGER_TABS}
+    for i in range(setup.get("ledger_rows", 0)):
+        tab = rng.choice(jeffbot.LEDGER_TABS)
+        ts = datetime.fromtimestamp(start_ts - rng.uniform(0, 90 * 86400), jeffbot.GB_TZ).strftime("%Y-%m-%d %H:%M:%S")
+        kind = rng.choice(types)
+        gold = -rng.randint(100, 5000) if kind == "Withdraw" else rng.randint(100, 5000)
+        tabs[tab].append([ts, rng.choice(list(jeffbot.PLAYER_MAP.values())), kind, str(gold), ""])
+    tabs[jeffbot.TAB_DASHBOARD] = [["Gbank", ""]]
+    book = FakeSpreadsheet(tabs, setup.get("balance", 0), latency)
+
+    state = jeffbot.load_state()
+    for i in range(setup.get("timers_due", 0)):
+        state["timers"][f"tt_load{i}"] = {"end_time": int(start_ts + rng.uniform(0, 60)), "channel_id": PINNED_CHANNEL_ID,
+                                          "status": "running", "display": f"Load {i}", "hidden": False}
+    for i in range(setup.get("demos", 0)):
+        loc = f"site{i}"
+        state["timers"][f"demo_{loc}_main"] = {"end_time": int(start_ts + 3 * 86400 + i * 3600), "channel_id": PINNED_CHANNEL_ID,
+                                               "status": "running", "display": f"Demo {loc}", "hidden": False}
+        state["timers"][f"demo_{loc}_3h"] = {"end_time": int(start_ts + 3 * 86400 + i * 3600 - 3 * 3600), "channel_id": PINNED_CHANNEL_ID,
+                                             "status": "running", "display": f"Demo Alert {loc} 3h", "hidden": True}
+    state["last_form_row"] = len(tabs[jeffbot.TAB_FORM])
+    jeffbot.save_state(state)
+    return book, start_ts
+
+def expand_events(scenario):
+    out = []
+    for ev in scenario.get("events", []):
+        for i in range(ev.get("repeat", 1)):
+            e = dict(ev); e["t"] = ev.get("t", 0) + i * ev.get("every", 0)
+            e.pop("repeat", None); e.pop("every", None)
+            out.append(e)
+    return sorted(out, key=lambda e: e["t"])
+
+def _coerce_args(callback, args):
+    """Wrap plain strings in app_commands.Choice where the handler expects a Choice."""
+    hints = typing.get_type_hints(callback)
+    out = {}
+    for k, v in args.items():
+        if typing.get_origin(hints.get(k)) is app_commands.Choice: v = app_commands.Choice(name=str(v), value=v)
+        out[k] = v
+    return out
+
+def _interval(loop):
+    return (loop.hours or 0) * 3600 + (loop.minutes or 0) * 60 + (loop.seconds or 0)
+
+class Harness:
+    SKIP_LOOPS = {"github_monitor"}  # Talks to the network
+
+    def __init__(self, scenario, latency):
+        self.scenario = scenario
+        self.book, self.start_ts = build_world(scenario, latency)
+        self.clock = VirtualClock(self.start_ts)
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.lag = []
+        self.inflight = set()
+        self.pinned = FakeChannel(PINNED_CHANNEL_ID, "pinned")
+        self.log = FakeChannel(jeffbot.LOG_CHANNEL_ID, "log")
+        self.users = {uid: FakeUser(uid, name) for uid, name in jeffbot.PLAYER_MAP.items()}
+        self.loops = {name: obj for name, obj in vars(jeffbot).items() if isinstance(obj, tasks.Loop) and name not in self.SKIP_LOOPS}
+        self.loop_due = {name: self.start_ts for name in self.loops}
+        self.webhook = None
+
+    def install(self):
+        jeffbot.time = self.clock
+        jeffbot.get_gb_time = lambda: datetime.fromtimestamp(self.clock.now, jeffbot.GB_TZ)
+        client = FakeGspreadClient(self.book)
+        jeffbot.get_gspread_client = lambda: client
+        channels = {PINNED_CHANNEL_ID: self.pinned, jeffbot.LOG_CHANNEL_ID: self.log}
+        jeffbot.bot.get_channel = channels.get
+        jeffbot.bot._connection.user = FakeUser(1, "JeffBot")
+        jeffbot.FORM_WEBHOOK_SECRET = "loadtest"
+        jeffbot.register_commands()
+
+    async def _lag_monitor(self, stop):
+        while not stop.is_set():
+            t0 = real_time.perf_counter()
+            await asyncio.sleep(0.01)
+            self.lag.append(max(0.0, real_time.perf_counter() - t0 - 0.01))
+
+    async def _timed(self, label, coro):
+        t0 = real_time.perf_counter()
+        try: await coro
+        except Exception as e:
+            self.errors[f"{label}: {type(e).__name__}: {e}"[:160]] += 1
+        self.latencies[label].append(real_time.perf_counter() - t0)
+
+    def _spawn(self, label, coro):
+        task = asyncio.create_task(self._timed(label, coro))
+        self.inflight.add(task); task.add_done_callback(self.inflight.discard)
+
+    def dispatch(self, ev):
+        user = self.users.get(ev.get("user"), next(iter(self.users.values())))
+        name = ev["cmd"]
+        slash = jeffbot.bot.tree.get_command(name)
+        if slash:
+            args = _coerce_args(slash.callback, ev.get("args", {}))
+            self._spawn(f"/{name}", slash.callback(FakeInteraction(user, self.pinned), **args))
+            return
+        prefix = jeffbot.bot.get_command(name)
+        if not prefix: raise SystemExit(f"Unknown command in script: {name}")
+        self._spawn(f"!{name}", prefix.callback(FakeContext(user, self.pinned), *ev.get("argv", []), **ev.get("args", {})))
+
+    def post_form(self, values):
+        """Stand-in for the sheet-side script: the row lands on the FORM tab, then is pushed to the webhook."""
+        tab = self.book.tabs[jeffbot.TAB_FORM]
+        tab.rows.append([str(v) for v in values])
+        self.book.revision += 1
+        body = {"row": len(tab.rows), "values": values}
+        async def post():
+            resp = await self.webhook.post("/form", json=body, headers={"X-Webhook-Secret": "loadtest"})
+            if resp.status != 200: raise RuntimeError(f"webhook {resp.status}: {await resp.text()}")
+        self._spawn("webhook:form", post())
+
+    def tick(self):
+        """Run every background loop and recurring job that has come due on the virtual clock."""
+        now = self.clock.now
+        for name, loop in self.loops.items():
+            if now >= self.loop_due[name]:
+                self.loop_due[name] = now + _interval(loop)
+                self._spawn(f"loop:{name}", loop.coro())
+        for job_id, job in list(jeffbot.load_state().get("jobs", {}).items()):
+            if job["next_run"] <= now: self._spawn(f"job:{job['action']}", jeffbot.fire_job(job_id))
+
+    async def run(self):
+        self.install()
+        jeffbot.seed_jobs(jeffbot.load_state())
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(self._lag_monitor(stop))
+        events = expand_events(self.scenario)
+        if any("form" in ev for ev in events):
+            from aiohttp.test_utils import TestClient, TestServer
+            self.webhook = TestClient(TestServer(jeffbot.build_form_webhook_app()))
+            await self.webhook.start_server()
+        wall0 = real_time.perf_counter()
+        for ev in events:
+            self.clock.advance_to(self.start_ts + ev["t"])
+            self.tick()
+            if "cmd" in ev: self.dispatch(ev)
+            if "form" in ev: self.post_form(ev["form"])
+            await asyncio.sleep(0)  # Let the burst interleave like real gateway traffic
+        while self.inflight: await asyncio.gather(*list(self.inflight))
+        if self.webhook: await self.webhook.close()
+        await jeffbot.flush_audit()
+        stop.set(); await lag_task
+        return real_time.perf_counter() - wall0
+
+def _pct(values, p):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def report(h, wall, as_json):
+    lat = {k: {"n": len(v), "p50_ms": _pct(v, 50) * 1000, "p90_ms": _pct(v, 90) * 1000, "p99_ms": _pct(v, 99) * 1000, "max_ms": max(v) * 1000}
+           for k, v in sorted(h.latencies.items())}
+    out = {
+        "wall_seconds": wall, "virtual_seconds": h.clock.now - h.start_ts, "virtual_wait_seconds": h.clock.waited,
+        "latency": lat, "discord_calls": dict(DISCORD_CALLS), "sheets_calls": dict(SHEETS_CALLS),
+        "loop_lag_ms": {"p50": _pct(h.lag, 50) * 1000, "p99": _pct(h.lag, 99) * 1000, "max": max(h.lag, default=0) * 1000},
+        "errors": dict(h.errors),
+    }
+    if as_json: return print(json.dumps(out, indent=2))
+    print(f"Replayed {out['virtual_seconds']:.0f}s of virtual time in {wall:.2f}s wall "
+          f"(virtual time spent in Sheets backoff/budget waits: {h.clock.waited:.1f}s)\n")
+    print(f"{'command':<28}{'n':>5}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for k, v in lat.items():
+        print(f"{k:<28}{v['n']:>5}{v['p50_ms']:>10.1f}{v['p90_ms']:>10.1f}{v['p99_ms']:>10.1f}{v['max_ms']:>10.1f}")
+    print(f"\nDiscord calls: {sum(DISCORD_CALLS.values())}  " + ", ".join(f"{k}={v}" for k, v in sorted(DISCORD_CALLS.items())))
+    print(f"Sheets calls:  {sum(SHEETS_CALLS.values())}  " + ", ".join(f"{k}={v}" for k, v in sorted(SHEETS_CALLS.items())))
+    l = out["loop_lag_ms"]
+    print(f"Event-loop lag: p50 {l['p50']:.1f} ms | p99 {l['p99']:.1f} ms | max {l['max']:.1f} ms")
+    if h.errors:
+        print("\nErrors:")
+        for k, v in h.errors.items(): print(f"  {v}x {k}")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--script", help="JSON scenario / recording to replay (default: built-in burst)")
+    ap.add_argument("--sheets-latency-ms", type=float, default=0, help="Simulated latency per Sheets request")
+    ap.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = ap.parse_args()
+    scenario = DEFAULT_SCENARIO
+    if args.script:
+        with open(os.path.join(HERE, args.script) if not os.path.isabs(args.script) else args.script) as f: scenario = json.load(f)
+    h = Harness(scenario, args.sheets_latency_ms / 1000)
+    wall = asyncio.run(h.run())
+    report(h, wall, args.json)
+
+if __name__ == "__main__":
+    main()